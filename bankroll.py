@@ -0,0 +1,282 @@
+import argparse
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+import numpy as np
+from tqdm import tqdm
+
+from counting import CountingSession, LinearBetRamp
+from game import BlackjackSession
+from history import read_history
+from player import dealer_strategy, player_strategy
+from rng import RNG_BACKENDS, make_stream
+from runner import DEFAULT_CHUNK_SIZE, run_chunks
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# Sessions are simulated SESSION_BLOCK at a time, ROUND_BLOCK rounds at a
+# time, so memory stays bounded however many sessions or rounds there are.
+SESSION_BLOCK = 1 << 13
+ROUND_BLOCK = 1 << 9
+
+@dataclass
+class OutcomeDistribution:
+    # Money won per round, as its distinct values and their probabilities.
+    # Rounds are treated as independent draws from it, which ignores how the
+    # shoe ties neighbouring rounds together.
+    outcomes: np.ndarray
+    probabilities: np.ndarray
+
+    @classmethod
+    def from_counts(cls, counts: Dict[float, int]) -> "OutcomeDistribution":
+        outcomes = np.array(sorted(counts), dtype=np.float64)
+        frequencies = np.array([counts[outcome] for outcome in sorted(counts)], dtype=np.float64)
+        return cls(outcomes, frequencies / frequencies.sum())
+
+    @classmethod
+    def from_samples(cls, samples: Iterable[float]) -> "OutcomeDistribution":
+        outcomes, frequencies = np.unique(np.asarray(samples, dtype=np.float64), return_counts=True)
+        return cls(outcomes, frequencies / frequencies.sum())
+
+    @property
+    def mean(self) -> float:
+        return float(self.outcomes @ self.probabilities)
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(((self.outcomes - self.mean) ** 2) @ self.probabilities))
+
+    def sample(self, rng: np.random.Generator, shape) -> np.ndarray:
+        # Inverse-CDF sampling, one searchsorted over the whole block.
+        cumulative = np.cumsum(self.probabilities)
+        cumulative[-1] = 1.0
+        return self.outcomes[np.searchsorted(cumulative, rng.random(shape), side="right")]
+
+
+def measure_chunk(
+    num_rounds: int, num_decks: int, dealer_strategy: Callable, player_strategy: Callable,
+    bet_amount: int, rng, session_class: type = BlackjackSession, session_options: Optional[dict] = None
+) -> Counter:
+    session = session_class(num_decks, dealer_strategy, player_strategy, rng=rng, **(session_options or {}))
+    return Counter(session.play_round(bet_amount) for _ in range(num_rounds))
+
+
+def measure_outcomes(
+    num_rounds: int,
+    num_decks: int,
+    dealer_strategy: Callable,
+    player_strategy: Callable,
+    bet_amount: int,
+    seed: int = 0,
+    num_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: bool = True,
+    session_class: type = BlackjackSession,
+    session_options: Optional[dict] = None,
+    rng_backend: str = "python",
+) -> OutcomeDistribution:
+    # Plays rounds exactly like runner.run_simulation (same chunks, streams
+    # and scheduler), but keeps how often each per-round result came up. A
+    # CountingSession with a bet ramp folds the bet spread into the outcomes.
+    def chunk_args(index: int) -> tuple:
+        return (
+            min(chunk_size, num_rounds - index * chunk_size), num_decks, dealer_strategy, player_strategy,
+            bet_amount, make_stream(rng_backend, seed, index), session_class, session_options
+        )
+
+    counts = Counter()
+    num_chunks = -(-num_rounds // chunk_size)
+    with tqdm(total=num_rounds, disable=not progress) as progress_bar:
+        for chunk_counts in run_chunks(measure_chunk, chunk_args, num_chunks, num_workers=num_workers):
+            counts.update(chunk_counts)
+            progress_bar.update(sum(chunk_counts.values()))
+    return OutcomeDistribution.from_counts(counts)
+
+
+def outcomes_from_history(paths: Iterable[str]) -> OutcomeDistribution:
+    # Per-round results from hand history files (see history.py), e.g. the
+    # chunk files of a run_simulation(..., history_dir=...).
+    samples = []
+    for path in paths:
+        records = read_history(path)
+        samples.append(np.asarray(records["round_won"][records["hand"] == 0], dtype=np.float64))
+    return OutcomeDistribution.from_samples(np.concatenate(samples))
+
+
+@dataclass
+class BankrollResult:
+    # One entry per session. Rounds are 1-based and -1 means it never
+    # happened; ruined sessions stop at ruin, the rest play every round. A
+    # round never loses more than the bankroll left, so no session ends
+    # below zero.
+    bankroll: float
+    num_rounds: int
+    ruin_round: np.ndarray
+    double_round: np.ndarray
+    max_drawdown: np.ndarray
+    final_bankroll: np.ndarray
+
+    @property
+    def num_sessions(self) -> int:
+        return len(self.ruin_round)
+
+    @property
+    def risk_of_ruin(self) -> float:
+        return float(np.mean(self.ruin_round >= 0))
+
+    @property
+    def chance_of_doubling(self) -> float:
+        return float(np.mean(self.double_round >= 0))
+
+    def drawdown_quantiles(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> np.ndarray:
+        return np.quantile(self.max_drawdown, list(quantiles))
+
+    def final_bankroll_quantiles(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> np.ndarray:
+        return np.quantile(self.final_bankroll, list(quantiles))
+
+    def time_to_double_quantiles(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> np.ndarray:
+        # Only over the sessions that doubled within num_rounds.
+        doubled = self.double_round[self.double_round >= 0]
+        if not len(doubled):
+            return np.full(len(list(quantiles)), np.nan)
+        return np.quantile(doubled, list(quantiles))
+
+
+def _first_true(mask: np.ndarray) -> np.ndarray:
+    # Column of the first True in each row, or -1.
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), -1)
+
+
+def simulate_session_block(
+    distribution: OutcomeDistribution, bankroll: float, num_sessions: int, num_rounds: int,
+    rng: np.random.Generator, ruin_level: float = 0.0, min_bet: float = 0.0
+):
+    # All sessions of the block advance ROUND_BLOCK rounds at a time: each
+    # step samples a (sessions, rounds) block of outcomes and turns it into
+    # bankroll paths with one cumsum. Ruined sessions drop out of later steps.
+    #
+    # A session is ruined once its bankroll is down to ruin_level or can no
+    # longer cover min_bet. A round that would take more than the session
+    # has left (a double or split it couldn't have paid for) takes it all.
+    ruin_round = np.full(num_sessions, -1, dtype=np.int64)
+    double_round = np.full(num_sessions, -1, dtype=np.int64)
+    max_drawdown = np.zeros(num_sessions)
+    current = np.full(num_sessions, float(bankroll))
+    peak = current.copy()
+    active = np.arange(num_sessions)
+
+    for start in range(0, num_rounds, ROUND_BLOCK):
+        if not len(active):
+            break
+        steps = min(ROUND_BLOCK, num_rounds - start)
+        paths = current[active, None] + np.cumsum(distribution.sample(rng, (len(active), steps)), axis=1)
+
+        # Nothing after a session's ruin counts, so paths stop there.
+        ruined_at = _first_true((paths <= ruin_level) | (paths < min_bet))
+        ruined = ruined_at >= 0
+        if ruined.any():
+            after_ruin = np.arange(steps) > np.where(ruined, ruined_at, steps)[:, None]
+            paths = np.maximum(np.where(after_ruin, np.nan, paths), 0)
+
+        peaks = np.fmax(peak[active, None], np.fmax.accumulate(paths, axis=1))
+        max_drawdown[active] = np.fmax(max_drawdown[active], np.nanmax(peaks - paths, axis=1))
+        peak[active] = peaks[:, -1]
+
+        not_doubled = double_round[active] < 0
+        doubled_at = _first_true(paths >= 2 * bankroll)
+        newly_doubled = not_doubled & (doubled_at >= 0)
+        double_round[active[newly_doubled]] = start + doubled_at[newly_doubled] + 1
+
+        current[active] = np.where(ruined, paths[np.arange(len(active)), np.maximum(ruined_at, 0)], paths[:, -1])
+        ruin_round[active[ruined]] = start + ruined_at[ruined] + 1
+        active = active[~ruined]
+
+    return ruin_round, double_round, max_drawdown, current
+
+
+def simulate_bankrolls(
+    distribution: OutcomeDistribution,
+    bankroll: float,
+    num_sessions: int,
+    num_rounds: int,
+    seed: int = 0,
+    ruin_level: float = 0.0,
+    min_bet: float = 0.0,
+    num_workers: Optional[int] = None,
+    progress: bool = True,
+) -> BankrollResult:
+    # Each block of SESSION_BLOCK sessions gets its own PCG64 stream and
+    # blocks are merged in order, so the result only depends on the seed,
+    # never on how many workers ran the blocks. The streams are spawned from
+    # the seed's SeedSequence rather than make_stream's jumped streams, so
+    # they never replay the shuffles measure_outcomes dealt with that seed.
+    # Block i's stream is the seed's i-th spawned child, built as the block
+    # is handed out by runner.run_chunks.
+    def block_args(index: int) -> tuple:
+        sequence = np.random.SeedSequence(seed, spawn_key=(index,))
+        return (
+            distribution, bankroll, min(SESSION_BLOCK, num_sessions - index * SESSION_BLOCK), num_rounds,
+            np.random.Generator(np.random.PCG64(sequence)), ruin_level, min_bet
+        )
+
+    results = []
+    num_blocks = -(-num_sessions // SESSION_BLOCK)
+    with tqdm(total=num_sessions, disable=not progress) as progress_bar:
+        for block_result in run_chunks(simulate_session_block, block_args, num_blocks, num_workers=num_workers):
+            results.append(block_result)
+            progress_bar.update(len(block_result[0]))
+
+    ruin_round, double_round, max_drawdown, final_bankroll = (
+        np.concatenate(arrays) for arrays in zip(*results)
+    )
+    return BankrollResult(bankroll, num_rounds, ruin_round, double_round, max_drawdown, final_bankroll)
+
+
+def format_bankroll(result: BankrollResult, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> List[str]:
+    quantiles = list(quantiles)
+    header = " ".join(f"{f'p{quantile * 100:g}':>9}" for quantile in quantiles)
+    def row(name, values):
+        return f"{name:16}" + " ".join(f"{value:9.1f}" for value in values)
+    return [
+        f"{result.num_sessions} sessions of {result.num_rounds} rounds from a bankroll of {result.bankroll:g}",
+        f"risk of ruin {result.risk_of_ruin:.3%}, doubled {result.chance_of_doubling:.3%}",
+        " " * 16 + header,
+        row("max drawdown", result.drawdown_quantiles(quantiles)),
+        row("final bankroll", result.final_bankroll_quantiles(quantiles)),
+        row("rounds to double", result.time_to_double_quantiles(quantiles)),
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate bankroll paths from measured per-round outcomes.")
+    parser.add_argument("--bankroll", type=float, default=1000)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--session-rounds", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=1_000_000, help="rounds played to measure outcomes")
+    parser.add_argument("--decks", type=int, default=6)
+    parser.add_argument("--bet", type=int, default=10)
+    parser.add_argument("--ramp", type=int, default=None, help="bet up to this many units by true count")
+    parser.add_argument("--history", nargs="+", default=None, help="measure outcomes from history files instead")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rng", choices=RNG_BACKENDS, default="python")
+    args = parser.parse_args()
+
+    if args.history:
+        distribution = outcomes_from_history(args.history)
+    elif args.ramp is not None:
+        distribution = measure_outcomes(
+            args.rounds, args.decks, dealer_strategy, player_strategy, args.bet, seed=args.seed,
+            num_workers=args.workers, session_class=CountingSession,
+            session_options={"bet_ramp": LinearBetRamp(args.ramp)}, rng_backend=args.rng,
+        )
+    else:
+        distribution = measure_outcomes(
+            args.rounds, args.decks, dealer_strategy, player_strategy, args.bet, seed=args.seed,
+            num_workers=args.workers, rng_backend=args.rng,
+        )
+    print(f"{len(distribution.outcomes)} distinct outcomes, mean {distribution.mean:+.3f} ± sd {distribution.std:.3f} per round")
+    result = simulate_bankrolls(
+        distribution, args.bankroll, args.sessions, args.session_rounds, seed=args.seed,
+        min_bet=args.bet, num_workers=args.workers,
+    )
+    print("\n".join(format_bankroll(result)))
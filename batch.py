@@ -0,0 +1,156 @@
+import numpy as np
+from utils import *
+from runner import SimulationResult
+from stats import RunningStats
+from strategy_table import *
+from player import basic_strategy
+
+# The batch engine deals card faces (utils.Card.face, TWO = 0 ... ACE = 12)
+# rather than Card objects, so like the game only two cards of the same
+# face make a pair: JACK+KING is a hard 20. Columns of every (..., 13) array
+# are indexed by face.
+
+# The utils hand-state tables as arrays. NEXT_STATE[state, face] is the
+# state after drawing a card of that face.
+NEXT_STATE = np.array(HAND_NEXT, dtype=np.int64).reshape(NUM_HAND_STATES, NUM_FACES)
+STATE_VALUES = np.array(HAND_VALUES, dtype=np.int64)
+# The face of a two-card pair, -1 for every other hand.
+STATE_PAIR_FACES = np.array(
+    [face if num_cards == 2 and pair_rank else -1
+     for (_, _, num_cards, face), pair_rank in zip(HAND_STATES, HAND_PAIR_RANKS)],
+    dtype=np.int64,
+)
+STATE_STRATEGY_STATES = np.array(STRATEGY_STATES, dtype=np.int64)
+FACE_RANK_ARRAY = np.array(FACE_RANKS, dtype=np.int64)
+
+HIT = Decision.HIT.value
+STAND = Decision.STAND.value
+SPLIT = Decision.SPLIT.value
+DOUBLE_DOWN = Decision.DOUBLE_DOWN.value
+
+class BatchSimulator:
+    # Plays many independent rounds at once, each from its own freshly
+    # shuffled shoe, i.e. the same game as BlackjackGame(...).play(...).
+    # Decisions come from a compiled strategy table and the dealer stands on all 17s.
+    def __init__(
+        self, num_decks: int, strategy: CompiledStrategy = basic_strategy, seed=None
+    ):
+        self.num_decks = num_decks
+        # The default rules have no surrender, so the game plays it as a hit.
+        self.decisions = np.array(
+            [HIT if decision == Decision.SURRENDER else decision.value for decision in strategy.decisions],
+            dtype=np.int8,
+        ).reshape(NUM_STATES, NUM_UPCARDS)
+        self.rng = np.random.default_rng(seed)
+
+        self.full_shoe = np.full(NUM_FACES, 4 * num_decks, dtype=np.int16)
+
+    def draw(self, rounds: np.ndarray) -> np.ndarray:
+        # Draws one card for each of the given rounds, which must be distinct.
+        counts = self.counts[rounds]
+        cumulative = np.cumsum(counts, axis=1)
+        target = (self.rng.random(len(rounds)) * cumulative[:, -1]).astype(np.int64)
+        face = (cumulative <= target[:, None]).sum(axis=1)
+        self.counts[rounds, face] -= 1
+        return face
+
+    def decide(self, state, upcard):
+        # `upcard` is the dealer's upcard face.
+        return self.decisions[STATE_STRATEGY_STATES[state], FACE_RANK_ARRAY[upcard] - 1]
+
+    def play_rounds(self, num_rounds: int):
+        self.counts = np.tile(self.full_shoe, (num_rounds, 1))
+        rounds = np.arange(num_rounds)
+
+        player_first = self.draw(rounds)
+        dealer_showing = self.draw(rounds)
+        player_second = self.draw(rounds)
+        dealer_hidden = self.draw(rounds)
+
+        # Finished player hands, as parallel chunks of (round, value, bet).
+        finished_rounds, finished_values, finished_bets = [], [], []
+
+        # Each round has at most one active hand at a time; the second half of
+        # a split waits in `pending` until the round's active hand finishes.
+        active_round = rounds
+        active_state = NEXT_STATE[NEXT_STATE[EMPTY_HAND, player_first], player_second]
+        pending_round = np.empty(0, dtype=np.int64)
+        pending_face = np.empty(0, dtype=np.int64)
+
+        while len(active_round) or len(pending_round):
+            if not len(active_round):
+                # Activate the first pending half of every round that has one.
+                _, first = np.unique(pending_round, return_index=True)
+                start = np.zeros(len(pending_round), dtype=bool)
+                start[first] = True
+                active_round = pending_round[start]
+                split_face = pending_face[start]
+                pending_round = pending_round[~start]
+                pending_face = pending_face[~start]
+
+                new_card = self.draw(active_round)
+                active_state = NEXT_STATE[NEXT_STATE[EMPTY_HAND, split_face], new_card]
+
+            decision = self.decide(active_state, dealer_showing[active_round])
+
+            splitting = decision == SPLIT
+            if splitting.any():
+                split_face = STATE_PAIR_FACES[active_state[splitting]]
+                pending_round = np.concatenate((pending_round, active_round[splitting]))
+                pending_face = np.concatenate((pending_face, split_face))
+                active_state[splitting] = NEXT_STATE[EMPTY_HAND, split_face]
+
+            drawing = np.flatnonzero(decision != STAND)
+            active_state[drawing] = NEXT_STATE[active_state[drawing], self.draw(active_round[drawing])]
+
+            value = STATE_VALUES[active_state]
+            done = (decision == STAND) | (decision == DOUBLE_DOWN) | (value > 21)
+            finished_rounds.append(active_round[done])
+            finished_values.append(value[done])
+            finished_bets.append(np.where(decision[done] == DOUBLE_DOWN, 2, 1))
+
+            active_round = active_round[~done]
+            active_state = active_state[~done]
+
+        hand_round = np.concatenate(finished_rounds)
+        hand_value = np.concatenate(finished_values)
+        hand_bet = np.concatenate(finished_bets)
+
+        # If the player busts on every hand, the dealer's hand is never played.
+        dealer_plays = np.zeros(num_rounds, dtype=bool)
+        dealer_plays[hand_round[hand_value <= 21]] = True
+        dealer_state = NEXT_STATE[NEXT_STATE[EMPTY_HAND, dealer_showing], dealer_hidden]
+        dealer_value = STATE_VALUES[dealer_state]
+        drawing = np.flatnonzero(dealer_plays & (dealer_value < 17))
+        while len(drawing):
+            dealer_state[drawing] = NEXT_STATE[dealer_state[drawing], self.draw(drawing)]
+            dealer_value[drawing] = STATE_VALUES[dealer_state[drawing]]
+            drawing = drawing[dealer_value[drawing] < 17]
+
+        dealer_final = dealer_value[hand_round]
+        won = np.where(
+            hand_value > 21, -1,
+            np.where(
+                (dealer_final > 21) | (hand_value > dealer_final), 1,
+                np.where(hand_value == dealer_final, 0, -1)
+            )
+        ) * hand_bet
+
+        money_won = np.bincount(hand_round, weights=won, minlength=num_rounds).astype(np.int64)
+        return money_won, len(hand_round)
+
+    def run(self, num_rounds: int, bet_amount: int, batch_size: int = 1_000_000) -> SimulationResult:
+        result = SimulationResult()
+        for start in range(0, num_rounds, batch_size):
+            money_won, hands_played = self.play_rounds(min(batch_size, num_rounds - start))
+            money_won *= bet_amount
+            result.merge(SimulationResult(
+                rounds_played=len(money_won),
+                hands_played=hands_played,
+                money_won=int(money_won.sum()),
+                money_bet=len(money_won) * bet_amount,
+                stats=RunningStats.from_sums(
+                    len(money_won), int(money_won.sum()), int((money_won * money_won).sum())
+                ),
+            ))
+        return result
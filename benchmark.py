@@ -0,0 +1,114 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+from typing import Dict
+
+from game import *
+from rng import NumpyRNG
+
+DECK_SIZES = (1, 2, 6, 8)
+
+def time_per_call(statement: Callable, number: int, repeat: int) -> float:
+    # Best of `repeat` runs, in microseconds per call.
+    return min(timeit.repeat(statement, number=number, repeat=repeat)) / number * 1e6
+
+def hands_per_second(num_decks: int, num_rounds: int, repeat: int, seed: int) -> float:
+    # Small shoes run dry mid-round every few thousand rounds (the shoe then
+    # reshuffles its discards), so every run must finish all its rounds.
+    best = None
+    for _ in range(repeat):
+        session = BlackjackSession(
+            num_decks, dealer_strategy, player_strategy, rng=random.Random(seed)
+        )
+        elapsed = timeit.timeit(lambda: session.play_round(10), number=num_rounds)
+        assert session.rounds_played == num_rounds, "A benchmark session stopped early!"
+        best = elapsed if best is None else min(best, elapsed)
+    return session.hands_played / best
+
+def run_benchmarks(num_rounds: int, repeat: int, seed: int, deck_sizes=DECK_SIZES) -> Dict[str, float]:
+    results = {}
+    for num_decks in deck_sizes:
+        random.seed(seed)
+        shoe = Shoe(num_decks, rng=random.Random(seed))
+        results[f"game_init_{num_decks}_decks_us"] = time_per_call(
+            lambda: BlackjackGame(num_decks, dealer_strategy, player_strategy), 500, repeat
+        )
+        results[f"reset_{num_decks}_decks_us"] = time_per_call(shoe.shuffle, 500, repeat)
+        numpy_shoe = Shoe(num_decks, rng=NumpyRNG(seed))
+        results[f"reset_numpy_{num_decks}_decks_us"] = time_per_call(numpy_shoe.shuffle, 500, repeat)
+        lazy_shoe = LazyShoe(num_decks, rng=random.Random(seed))
+        results[f"reset_lazy_{num_decks}_decks_us"] = time_per_call(lazy_shoe.shuffle, 500, repeat)
+        results[f"hands_per_sec_{num_decks}_decks"] = hands_per_second(
+            num_decks, num_rounds, repeat, seed
+        )
+
+    shoe = Shoe(6, rng=random.Random(seed))
+    def draw():
+        if shoe.needs_shuffle():
+            shoe.shuffle()
+        shoe.draw_card()
+    results["draw_card_us"] = time_per_call(draw, 100_000, repeat)
+
+    cards = [CARDS[CARD_IDS[(Suite.HEARTS, value)]] for value in (Value.ACE, Value.SIX, Value.NINE)]
+    hand = Hand(cards)
+    dealer_showing = CARDS[CARD_IDS[(Suite.CLUBS, Value.TEN)]]
+    results["calculate_hand_value_list_us"] = time_per_call(lambda: calculate_hand_value(cards), 100_000, repeat)
+    results["calculate_hand_value_hand_us"] = time_per_call(lambda: calculate_hand_value(hand), 100_000, repeat)
+    results["player_strategy_us"] = time_per_call(lambda: player_strategy(hand, dealer_showing), 100_000, repeat)
+
+    return results
+
+def find_regressions(results: Dict[str, float], baseline: Dict[str, float], threshold: float):
+    # Throughput metrics regress when they drop, timings when they grow.
+    regressions = []
+    for name, value in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]
+        if name.startswith("hands_per_sec"):
+            change = (old - value) / old
+        else:
+            change = (value - old) / old
+        if change > threshold:
+            regressions.append((name, old, value, change))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the simulation hot paths.")
+    parser.add_argument("--rounds", type=int, default=20_000, help="rounds per hands/sec measurement")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, the best is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--decks", type=int, nargs="+", default=list(DECK_SIZES))
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, e.g. 0.10 for 10%%")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.rounds, args.repeat, args.seed, args.decks)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "rounds": args.rounds,
+        "results": results,
+    }
+
+    for name, value in results.items():
+        print(f"{name:36} {value:14.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = find_regressions(results, baseline, args.threshold)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:.2f} -> {new:.2f} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
@@ -0,0 +1,139 @@
+import argparse
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from tqdm import tqdm
+
+from game import BlackjackGame
+from player import dealer_strategy, player_strategy, player_copy_dealer
+from rules import Rules, DEFAULT_RULES
+from rng import RNG_BACKENDS, make_stream
+from runner import DEFAULT_CHUNK_SIZE, run_chunks
+from shoe import Shoe
+from stats import RunningStats
+
+STRATEGIES = {
+    "basic": player_strategy,
+    "copy_dealer": player_copy_dealer,
+}
+
+@dataclass
+class ComparisonResult:
+    # Per-round winnings for each strategy, and the per-round difference
+    # between each strategy and the baseline (the first one), all from
+    # rounds dealt off the same shoes.
+    baseline: str = ""
+    winnings: Dict[str, RunningStats] = field(default_factory=dict)
+    differences: Dict[str, RunningStats] = field(default_factory=dict)
+
+    def merge(self, other: "ComparisonResult"):
+        self.baseline = other.baseline
+        for name, stats in other.winnings.items():
+            self.winnings.setdefault(name, RunningStats()).merge(stats)
+        for name, stats in other.differences.items():
+            self.differences.setdefault(name, RunningStats()).merge(stats)
+
+    def variance_reduction(self, name: str) -> float:
+        # How many times more rounds two independent runs would need to pin
+        # down the difference as tightly.
+        independent = self.winnings[name].variance + self.winnings[self.baseline].variance
+        paired = self.differences[name].variance
+        return independent / paired if paired else float("inf")
+
+
+def compare_chunk(
+    num_rounds: int, num_decks: int, dealer_strategy: Callable, strategies: Dict[str, Callable],
+    bet_amount: int, rng, rules: Rules = DEFAULT_RULES
+) -> ComparisonResult:
+    # Every round, each strategy plays its own copy of the shoe from the same
+    # position, so they all see the same cards in the same order for as long
+    # as they draw alike. The shoe then moves on as the baseline played it.
+    names = list(strategies)
+    baseline = names[0]
+    shoe = Shoe(num_decks, rng=rng)
+    sums = {name: [0, 0] for name in names}
+    difference_sums = {name: [0, 0] for name in names[1:]}
+
+    for _ in range(num_rounds):
+        shoe.shuffle_if_needed()
+        won = {}
+        for name in names[1:]:
+            game = BlackjackGame(num_decks, dealer_strategy, strategies[name], shoe=shoe.copy(), rules=rules)
+            won[name] = game.play(bet_amount)
+        game = BlackjackGame(num_decks, dealer_strategy, strategies[baseline], shoe=shoe, rules=rules)
+        won[baseline] = game.play(bet_amount)
+
+        for name, money_won in won.items():
+            sums[name][0] += money_won
+            sums[name][1] += money_won * money_won
+        for name in names[1:]:
+            difference = won[name] - won[baseline]
+            difference_sums[name][0] += difference
+            difference_sums[name][1] += difference * difference
+
+    return ComparisonResult(
+        baseline=baseline,
+        winnings={name: RunningStats.from_sums(num_rounds, *sums[name]) for name in names},
+        differences={name: RunningStats.from_sums(num_rounds, *difference_sums[name]) for name in names[1:]},
+    )
+
+
+def compare_strategies(
+    num_rounds: int,
+    num_decks: int,
+    dealer_strategy: Callable,
+    strategies: Dict[str, Callable],
+    bet_amount: int,
+    seed: int = 0,
+    num_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: bool = True,
+    rules: Rules = DEFAULT_RULES,
+    rng_backend: str = "python",
+) -> ComparisonResult:
+    # Chunks are seeded, scheduled and merged in order by the same
+    # runner.run_chunks as run_simulation, so the result only depends on the
+    # seed and chunk size.
+    def chunk_args(index: int) -> tuple:
+        return (
+            min(chunk_size, num_rounds - index * chunk_size), num_decks, dealer_strategy, strategies,
+            bet_amount, make_stream(rng_backend, seed, index), rules
+        )
+
+    result = ComparisonResult()
+    num_chunks = -(-num_rounds // chunk_size)
+    with tqdm(total=num_rounds, disable=not progress) as progress_bar:
+        for chunk_result in run_chunks(compare_chunk, chunk_args, num_chunks, num_workers=num_workers):
+            result.merge(chunk_result)
+            progress_bar.update(chunk_result.winnings[chunk_result.baseline].count)
+    return result
+
+
+def format_comparison(result: ComparisonResult, bet_amount: int) -> List[str]:
+    lines = []
+    for name, stats in result.winnings.items():
+        lines.append(f"{name:16} edge {stats.mean / bet_amount:+.3%} ± {stats.half_width() / bet_amount:.3%}")
+    for name, stats in result.differences.items():
+        lines.append(
+            f"{name} - {result.baseline}: {stats.mean / bet_amount:+.3%} ± {stats.half_width() / bet_amount:.3%}"
+            f" per round ({result.variance_reduction(name):.1f}x fewer rounds than independent runs)"
+        )
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare strategies on the same shoes.")
+    parser.add_argument("--strategies", nargs="+", choices=sorted(STRATEGIES), default=["basic", "copy_dealer"])
+    parser.add_argument("--rounds", type=int, default=100_000)
+    parser.add_argument("--decks", type=int, default=6)
+    parser.add_argument("--bet", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rng", choices=RNG_BACKENDS, default="python")
+    args = parser.parse_args()
+
+    result = compare_strategies(
+        args.rounds, args.decks, dealer_strategy,
+        {name: STRATEGIES[name] for name in args.strategies},
+        args.bet, seed=args.seed, num_workers=args.workers, rng_backend=args.rng,
+    )
+    print("\n".join(format_comparison(result, args.bet)))
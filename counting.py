@@ -0,0 +1,122 @@
+import inspect
+from typing import Callable, Optional, Sequence
+from utils import *
+from shoe import *
+from game import BlackjackSession
+from profiling import GameProfiler
+from rules import Rules, DEFAULT_RULES
+from history import HandHistoryWriter
+from decision_stats import DecisionStats
+
+# Tag tables are indexed by compact rank (index 0 is unused, 1 is an ace).
+HI_LO = (0, -1, 1, 1, 1, 1, 1, 0, 0, 0, -1)
+KO = (0, -1, 1, 1, 1, 1, 1, 1, 0, 0, -1)
+HI_OPT_I = (0, 0, 0, 1, 1, 1, 1, 0, 0, 0, -1)
+
+class CountingShoe(Shoe):
+    # A shoe that keeps a running count as it deals. Each draw adds one
+    # precomputed tag, so the count costs O(1) per card and never rescans the
+    # dealt cards. The dealer's hole card, the fourth card of a round in
+    # BlackjackGame.deal's order, stays out of the count until the round is
+    # over, since the player can't see it before then.
+    def __init__(
+        self, num_decks: int, tags: Sequence[int] = HI_LO, rng=None, initial_count: int = 0,
+        penetration: float = DEFAULT_PENETRATION
+    ):
+        self.card_tags = tuple(tags[rank] for rank in CARD_RANKS)
+        self.initial_count = initial_count
+        super().__init__(num_decks, rng=rng, penetration=penetration)
+
+    HOLE_CARD = 4
+    hole_tag = 0
+
+    def shuffle(self):
+        super().shuffle()
+        self.running_count = self.initial_count
+        self.hole_tag = 0
+
+    def start_round(self):
+        # The last round's hole card has been turned over by now.
+        super().start_round()
+        if self.hole_tag:
+            self.running_count += self.hole_tag
+            self.hole_tag = 0
+        self.round_cards = 0
+
+    def reshuffle_discards(self):
+        # Only the cards still on the table stay counted, and the hole card
+        # is still face down.
+        super().reshuffle_discards()
+        self.running_count = (
+            self.initial_count + sum(self.card_tags[card_id] for card_id in self.in_play) - self.hole_tag
+        )
+
+    @property
+    def true_count(self) -> float:
+        decks_remaining = len(self.deck) / CARDS_PER_DECK
+        return self.running_count / decks_remaining if decks_remaining else 0.0
+
+    def draw_card(self) -> Card:
+        if not self.deck:
+            self.reshuffle_discards()
+        card_id = self.deck.pop()
+        self.round_cards += 1
+        if self.round_cards == self.HOLE_CARD:
+            self.hole_tag = self.card_tags[card_id]
+        else:
+            self.running_count += self.card_tags[card_id]
+        return CARDS[card_id]
+
+    def draw_rank(self) -> int:
+        if not self.deck:
+            self.reshuffle_discards()
+        card_id = self.deck.pop()
+        self.round_cards += 1
+        if self.round_cards == self.HOLE_CARD:
+            self.hole_tag = self.card_tags[card_id]
+        else:
+            self.running_count += self.card_tags[card_id]
+        return CARD_RANKS[card_id]
+
+
+class LinearBetRamp:
+    # Bets one unit up to a true count of 1, then one more unit per true
+    # count, capped at max_units.
+    def __init__(self, max_units: int):
+        self.max_units = max_units
+
+    def __call__(self, true_count: float) -> int:
+        return min(self.max_units, max(1, int(true_count)))
+
+
+def flat_bet(true_count: float) -> int:
+    return 1
+
+
+class CountingSession(BlackjackSession):
+    # A BlackjackSession dealing from a CountingShoe. Each round bets
+    # bet_amount * bet_ramp(true count), and player strategies that take a
+    # `true_count` keyword argument are handed the current true count.
+    def __init__(
+        self, num_decks: int, dealer_strategy: Callable, player_strategy: Callable,
+        rng=None, profiler: Optional[GameProfiler] = None,
+        tags: Sequence[int] = HI_LO, bet_ramp: Callable[[float], int] = flat_bet,
+        rules: Rules = DEFAULT_RULES, penetration: float = DEFAULT_PENETRATION,
+        history: Optional[HandHistoryWriter] = None, decision_stats: Optional[DecisionStats] = None
+    ):
+        shoe = CountingShoe(num_decks, tags=tags, rng=rng, penetration=penetration)
+        if "true_count" in inspect.signature(player_strategy).parameters:
+            uncounted_strategy = player_strategy
+            def player_strategy(player_cards, dealer_showing):
+                return uncounted_strategy(player_cards, dealer_showing, true_count=shoe.true_count)
+
+        super().__init__(
+            num_decks, dealer_strategy, player_strategy, rng=rng, profiler=profiler, shoe=shoe,
+            rules=rules, history=history, decision_stats=decision_stats
+        )
+        self.bet_ramp = bet_ramp
+
+    def round_bet(self, bet_amount: int) -> int:
+        # The shoe has just started the round, so the count includes the
+        # last round's hole card and a reshuffle has already reset it.
+        return bet_amount * self.bet_ramp(self.shoe.true_count)
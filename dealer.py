@@ -0,0 +1,116 @@
+import numpy as np
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List
+from shoe import Counts
+from utils import EMPTY_HAND, HAND_IS_SOFT, HAND_NEXT, HAND_VALUES, NUM_FACES, RANK_FACES
+
+# Dealer outcomes are probabilities of finishing on 17, 18, 19, 20, 21 or busting.
+DEALER_TOTALS = (17, 18, 19, 20, 21)
+BUST = len(DEALER_TOTALS)
+
+@lru_cache(maxsize=None)
+def dealer_draws(upcard: int, hit_soft_17: bool = False):
+    # Every multiset of cards the dealer can draw (hole card included) before
+    # standing, with how many valid orderings it has and the outcome it ends
+    # in. Every ordering of one multiset is equally likely under any shoe
+    # composition, so this table only has to be built once per upcard.
+    orderings = {}
+    outcomes = {}
+
+    def walk(state: int, drawn: List[int]):
+        value = HAND_VALUES[state]
+        if value >= 17 and not (hit_soft_17 and HAND_IS_SOFT[state] and value == 17):
+            key = tuple(drawn)
+            orderings[key] = orderings.get(key, 0) + 1
+            outcomes[key] = BUST if value > 21 else value - 17
+            return
+        for rank in range(1, 11):
+            drawn[rank - 1] += 1
+            walk(HAND_NEXT[state * NUM_FACES + RANK_FACES[rank]], drawn)
+            drawn[rank - 1] -= 1
+
+    walk(HAND_NEXT[EMPTY_HAND * NUM_FACES + RANK_FACES[upcard]], [0] * 10)
+    keys = list(orderings)
+    drawn = np.array(keys, dtype=np.int64)
+    max_drawn = int(drawn.max())
+    num_drawn = drawn.sum(axis=1)
+    return (
+        # Flat indices into a (rank, cards drawn) falling factorial table.
+        np.arange(10) * (max_drawn + 1) + drawn,
+        np.arange(max_drawn),
+        num_drawn,
+        np.arange(int(num_drawn.max())),
+        np.array([orderings[key] for key in keys], dtype=np.float64),
+        np.array([outcomes[key] for key in keys], dtype=np.int64),
+    )
+
+def dealer_outcomes(upcard: int, counts: Counts, hit_soft_17: bool = False) -> np.ndarray:
+    # Probabilities of the dealer finishing on 17-21 or busting, given the
+    # upcard and the composition of every card the dealer hasn't shown.
+    table_index, rank_steps, num_drawn, shoe_steps, orderings, outcomes = dealer_draws(
+        upcard, hit_soft_17
+    )
+    counts = np.array(counts, dtype=np.float64)
+
+    # The chance of one particular draw order is the product of each rank's
+    # falling factorial over the falling factorial of the whole shoe.
+    rank_factorials = np.ones((10, len(rank_steps) + 1))
+    rank_factorials[:, 1:] = np.maximum(counts[:, None] - rank_steps, 0).cumprod(axis=1)
+    shoe_factorials = np.ones(len(shoe_steps) + 1)
+    shoe_factorials[1:] = (counts.sum() - shoe_steps).cumprod()
+
+    weights = rank_factorials.ravel()[table_index].prod(axis=1)
+    probabilities = orderings * weights / shoe_factorials[num_drawn]
+    return np.bincount(outcomes, weights=probabilities, minlength=BUST + 1)
+
+def stand_ev(value: int, dealer: np.ndarray) -> float:
+    ev = dealer[BUST]
+    for index, total in enumerate(DEALER_TOTALS):
+        if value > total:
+            ev += dealer[index]
+        elif value < total:
+            ev -= dealer[index]
+    return ev
+
+
+
+class DealerOutcomeCache:
+    # An LRU cache of dealer outcome distributions keyed by (upcard, shoe
+    # composition), for either the S17 dealer_strategy or the H17
+    # dealer_strategy_h17. With quantum > 1, compositions are rounded to
+    # multiples of it so nearby shoes share one (approximate) entry.
+    def __init__(self, hit_soft_17: bool = False, maxsize: int = 1_000_000, quantum: int = 1):
+        self.hit_soft_17 = hit_soft_17
+        self.maxsize = maxsize
+        self.quantum = quantum
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def quantize(self, counts: Counts) -> Counts:
+        if self.quantum == 1:
+            return counts
+        quantum = self.quantum
+        return tuple((count + quantum // 2) // quantum * quantum for count in counts)
+
+    def get(self, upcard: int, counts: Counts) -> np.ndarray:
+        key = (upcard, self.quantize(counts))
+        entries = self.entries
+        outcome = entries.get(key)
+        if outcome is not None:
+            self.hits += 1
+            entries.move_to_end(key)
+            return outcome
+
+        self.misses += 1
+        outcome = dealer_outcomes(upcard, key[1], self.hit_soft_17)
+        entries[key] = outcome
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+        return outcome
+
+
+# Shared caches for the two dealer_strategy variants.
+s17_dealer_outcomes = DealerOutcomeCache(hit_soft_17=False)
+h17_dealer_outcomes = DealerOutcomeCache(hit_soft_17=True)
@@ -0,0 +1,212 @@
+import argparse
+import csv
+import functools
+from typing import Callable, List
+import numpy as np
+from utils import *
+from strategy_table import *
+
+NUM_DECISIONS = len(Decision)
+
+# Rows and columns in the same order as utils.hard_totals, soft_totals and
+# pair_splitting. Upcard columns are compact ranks, so TEN stands for every
+# ten-valued card.
+UPCARD_VALUES = [value for value in Value if value not in (Value.JACK, Value.QUEEN, Value.KING)]
+TABLE_ROWS = (
+    [("hard", str(total), HARD_TOTALS.index(total)) for total in hard_totals]
+    + [("soft", str(total), SOFT_OFFSET + SOFT_TOTALS.index(total)) for total in soft_totals]
+    + [("pair", value.name, PAIR_OFFSET + rank_map[value] - 1) for value in pair_splitting]
+)
+DECISION_LETTERS = {Decision.HIT: "H", Decision.STAND: "S", Decision.SPLIT: "P", Decision.DOUBLE_DOWN: "D", Decision.SURRENDER: "R"}
+
+class DecisionStats:
+    # Opt-in per-(state, upcard, decision) counters. A session handed one
+    # picks the recording path once: its player strategy is wrapped by
+    # recording_strategy and its rounds are played by game.RecordingGame, so
+    # sessions without one are untouched. Totals are kept in NumPy arrays
+    # preallocated to every (strategy_table state, upcard rank, Decision)
+    # cell; the cells decided are staged in a list and added to the totals
+    # with np.bincount every FLUSH_SIZE decisions.
+    #
+    # Each decision the player strategy makes is credited with what the hand
+    # it was made for went on to win, in units of the round's bet; a SPLIT is
+    # credited with both halves together. Decisions are recorded as the
+    # strategy made them, before the rules turn e.g. a disallowed DOUBLE_DOWN
+    # into a HIT.
+    FLUSH_SIZE = 1 << 16
+
+    def __init__(self):
+        size = NUM_STATES * NUM_UPCARDS * NUM_DECISIONS
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.won = np.zeros(size)
+        self.won_squared = np.zeros(size)
+        # Staged cells and what each one won, then the current round's
+        # (first cell, end cell, outcomes) of every play_player_hand call it
+        # finished, and its dealer total if the dealer played.
+        self.cells = []
+        self.cell_won = []
+        self.hands = []
+        self.dealer_value = None
+
+    def recording_strategy(self, player_strategy: Callable) -> Callable:
+        # Built once per session; every decision is staged as its flat cell.
+        cells = self.cells
+        @functools.wraps(player_strategy)
+        def recording_player_strategy(player_cards, dealer_showing):
+            decision = player_strategy(player_cards, dealer_showing)
+            cells.append(
+                (STRATEGY_STATES[player_cards.state] * NUM_UPCARDS + dealer_showing.rank - 1) * NUM_DECISIONS
+                + decision.value
+            )
+            return decision
+        return recording_player_strategy
+
+    def record_round(self, money_won, bet_amount: int):
+        hands = self.hands
+        if len(hands) == 1:
+            # One hand played, so it won whatever the round won, naturals
+            # and surrender included.
+            self.cell_won.extend([money_won / bet_amount] * (len(self.cells) - len(self.cell_won)))
+        elif hands:
+            self.record_split_round(bet_amount)
+        # With no hands played, the round was settled on naturals.
+        hands.clear()
+        self.dealer_value = None
+        if len(self.cells) >= self.FLUSH_SIZE:
+            self.flush()
+
+    def record_split_round(self, bet_amount: int):
+        # Split hands are settled one by one. If the dealer never played,
+        # every hand lost: they all busted or an unpeeked natural took them.
+        # The outermost hand finishes last, holding every outcome.
+        dealer_value = self.dealer_value
+        hand_won = {}
+        for outcome in self.hands[-1][2]:
+            if outcome.value > 21 or dealer_value is None or outcome.value < dealer_value <= 21:
+                hand_won[id(outcome)] = -outcome.money_bet
+            elif outcome.value == dealer_value:
+                hand_won[id(outcome)] = 0
+            else:
+                hand_won[id(outcome)] = outcome.money_bet
+
+        # Hands finish innermost first, so each cell goes to the first hand
+        # whose range holds it.
+        first_cell = len(self.cell_won)
+        round_won = [None] * (len(self.cells) - first_cell)
+        for start, end, outcomes in self.hands:
+            units = sum(hand_won[id(outcome)] for outcome in outcomes) / bet_amount
+            for cell in range(start - first_cell, end - first_cell):
+                if round_won[cell] is None:
+                    round_won[cell] = units
+        self.cell_won.extend(round_won)
+
+    def flush(self):
+        if not self.cells:
+            return
+        size = len(self.counts)
+        cells = np.array(self.cells, dtype=np.intp)
+        cell_won = np.array(self.cell_won)
+        self.counts += np.bincount(cells, minlength=size)
+        self.won += np.bincount(cells, weights=cell_won, minlength=size)
+        self.won_squared += np.bincount(cells, weights=cell_won * cell_won, minlength=size)
+        # Cleared in place, since the recording strategy holds on to the list.
+        self.cells.clear()
+        self.cell_won.clear()
+
+    def merge(self, other: "DecisionStats"):
+        self.flush()
+        other.flush()
+        self.counts += other.counts
+        self.won += other.won
+        self.won_squared += other.won_squared
+
+    def arrays(self):
+        # (counts, summed winnings, summed squared winnings), each shaped
+        # (NUM_STATES, NUM_UPCARDS, NUM_DECISIONS).
+        self.flush()
+        shape = (NUM_STATES, NUM_UPCARDS, NUM_DECISIONS)
+        return self.counts.reshape(shape), self.won.reshape(shape), self.won_squared.reshape(shape)
+
+    def ev(self) -> np.ndarray:
+        # Mean winnings per unit bet after each decision, nan where it was never made.
+        counts, won, _ = self.arrays()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, won / counts, np.nan)
+
+    def stderr(self) -> np.ndarray:
+        counts, won, won_squared = self.arrays()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            variance = (won_squared - won * won / counts) / (counts - 1)
+            return np.where(counts > 1, np.sqrt(np.maximum(variance, 0) / counts), np.nan)
+
+    def frequencies(self) -> np.ndarray:
+        # How often each decision was made in each (state, upcard) cell.
+        counts = self.arrays()[0]
+        totals = counts.sum(axis=2, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(totals > 0, counts / totals, np.nan)
+
+    def write_csv(self, path: str):
+        # One line per cell and decision made there, rows in strategy dict order.
+        counts = self.arrays()[0]
+        ev = self.ev()
+        stderr = self.stderr()
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["table", "row", "upcard", "decision", "count", "frequency", "ev", "stderr"])
+            for table, row, state in TABLE_ROWS:
+                for upcard in UPCARD_VALUES:
+                    column = rank_map[upcard] - 1
+                    total = counts[state, column].sum()
+                    for decision in Decision:
+                        count = counts[state, column, decision.value]
+                        if count:
+                            writer.writerow([
+                                table, row, upcard.name, decision.name, count, count / total,
+                                ev[state, column, decision.value], stderr[state, column, decision.value],
+                            ])
+
+    def format_tables(self) -> List[str]:
+        # Strategy-table grids: each cell shows the decision made most often
+        # there and its EV per unit bet.
+        counts = self.arrays()[0]
+        ev = self.ev()
+        lines = []
+        for table in ("hard", "soft", "pair"):
+            lines.append(f"{table:>6} " + " ".join(f"{value.name:>7}" for value in UPCARD_VALUES))
+            for row_table, row, state in TABLE_ROWS:
+                if row_table != table:
+                    continue
+                cells = []
+                for upcard in UPCARD_VALUES:
+                    column = rank_map[upcard] - 1
+                    if not counts[state, column].any():
+                        cells.append(f"{'.':>7}")
+                        continue
+                    decision = Decision(int(counts[state, column].argmax()))
+                    cells.append(f"{DECISION_LETTERS[decision]}{ev[state, column, decision.value]:+6.2f}")
+                lines.append(f"{row:>6} " + " ".join(cells))
+            lines.append("")
+        return lines
+
+
+if __name__ == "__main__":
+    from player import dealer_strategy, player_strategy
+    from runner import run_simulation
+
+    parser = argparse.ArgumentParser(description="Per-cell EV of the basic strategy table from one simulation.")
+    parser.add_argument("--rounds", type=int, default=1_000_000)
+    parser.add_argument("--decks", type=int, default=6)
+    parser.add_argument("--bet", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--csv", default=None, help="also write every cell to this CSV file")
+    args = parser.parse_args()
+
+    result = run_simulation(
+        args.rounds, args.decks, dealer_strategy, player_strategy, args.bet,
+        seed=args.seed, num_workers=args.workers, decision_stats=True,
+    )
+    print("\n".join(result.decision_stats.format_tables()))
+    if args.csv:
+        result.decision_stats.write_csv(args.csv)
@@ -0,0 +1,235 @@
+from dataclasses import fields
+from typing import Callable, Dict, Optional, Tuple
+from utils import *
+from shoe import *
+from dealer import *
+from player import basic_strategy
+from rules import Rules, DEFAULT_RULES
+
+# Strategies are shown one representative Card per rank. Two tens are shown
+# as TEN+TEN when they are a pair, and as TEN+JACK when they aren't.
+RANK_CARDS = {
+    rank_map[value]: CARDS[CARD_IDS[(Suite.HEARTS, value)]]
+    for value in Value
+    if value not in (Value.JACK, Value.QUEEN, Value.KING)
+}
+OTHER_TEN = CARDS[CARD_IDS[(Suite.HEARTS, Value.JACK)]]
+
+# The hole card that gives the dealer a natural, by upcard.
+NATURAL_HOLE_CARDS = {1: 10, 10: 1}
+
+# Every Rules field the EV recursion knows how to play. Any other field set
+# away from its default is rejected rather than solved as if it weren't there.
+MODELLED_RULES = {
+    "dealer_hits_soft_17", "double_after_split", "max_hands", "split_aces_one_card",
+    "surrender", "blackjack_payout", "dealer_peeks",
+}
+
+def check_modelled(rules: Rules):
+    for rule in fields(rules):
+        if rule.init and rule.name not in MODELLED_RULES and getattr(rules, rule.name) != rule.default:
+            raise ValueError(f"The EV calculation doesn't model the {rule.name} rule")
+
+def split_hands(max_hands: Optional[int]) -> Tuple[Optional[int], Optional[int]]:
+    # How many hands each half of a split may end up as. The split halves
+    # are evaluated independently, so the round's limit is shared out
+    # between them up front; this is exact for no limit and for limits of
+    # 1 or 2, and never lets a round go over the limit.
+    if max_hands is None:
+        return None, None
+    return (max_hands + 1) // 2, max_hands // 2
+
+def ten_pair_probability(counts: Counts) -> float:
+    # Counts don't tell TEN/JACK/QUEEN/KING apart, so for two tens just dealt
+    # this is the chance they share a face, taking the shoe's tens (those two
+    # included) to be spread evenly over the four faces. Exact for a full shoe.
+    tens = counts[9] + 2
+    return max(tens / 4 - 1, 0) / (tens - 1)
+
+class DealerModel:
+    # Dealer outcomes as the player sees them under `rules`. A peeking dealer
+    # has already turned over any natural, so outcomes are conditioned on
+    # there not being one. A dealer that doesn't peek, at a table paying
+    # naturals, beats every 21 with a natural. Otherwise a natural is just 21.
+    def __init__(self, dealer: DealerOutcomeCache = s17_dealer_outcomes, rules: Rules = DEFAULT_RULES):
+        check_modelled(rules)
+        if rules.dealer_hits_soft_17 is not None:
+            dealer = h17_dealer_outcomes if rules.dealer_hits_soft_17 else s17_dealer_outcomes
+        self.dealer = dealer
+        self.rules = rules
+        self.natural_beats_21 = rules.blackjack_payout is not None and not rules.dealer_peeks
+
+    def natural_probability(self, upcard: int, counts: Counts) -> float:
+        # `counts` are the cards the dealer's hole card can be.
+        hole_card = NATURAL_HOLE_CARDS.get(upcard)
+        return counts[hole_card - 1] / sum(counts) if hole_card else 0.0
+
+    def outcomes(self, upcard: int, counts: Counts) -> np.ndarray:
+        outcomes = self.dealer.get(upcard, counts)
+        if self.rules.dealer_peeks:
+            natural = self.natural_probability(upcard, counts)
+            if natural:
+                outcomes = outcomes.copy()
+                outcomes[DEALER_TOTALS.index(21)] -= natural
+                outcomes /= 1 - natural
+        return outcomes
+
+    def stand_ev(self, value: int, upcard: int, counts: Counts) -> float:
+        ev = stand_ev(value, self.outcomes(upcard, counts))
+        if value == 21 and self.natural_beats_21:
+            ev -= self.natural_probability(upcard, counts)
+        return ev
+
+class EVCalculator:
+    # Computes the expected value of a player strategy per unit bet, by
+    # recursing over every card the player and dealer can draw from the
+    # remaining shoe. Dealer outcomes come from a DealerOutcomeCache, which
+    # also decides whether the dealer hits soft 17 unless `rules` does.
+    #
+    # Hands are played the way BlackjackGame plays them under `rules`.
+    # Every hand is exact except split hands: each half is evaluated from the
+    # composition left after the split, ignoring the cards the other half
+    # takes, which is the usual approximation for splits; a max_hands limit
+    # is shared out between the halves (see split_hands).
+    def __init__(
+        self, player_strategy: Callable, dealer: DealerOutcomeCache = s17_dealer_outcomes,
+        rules: Rules = DEFAULT_RULES
+    ):
+        self.player_strategy = player_strategy
+        self.dealer = DealerModel(dealer, rules)
+        self.rules = rules
+        self.cache: Dict[tuple, float] = {}
+
+    def hand_ev(
+        self, ranks: Tuple[int, ...], upcard: int, counts: Counts, distinct_faces: bool = False,
+        split_rank: int = 0, max_hands: Optional[int] = None
+    ) -> float:
+        # `counts` excludes the player's cards and the dealer's upcard. With
+        # distinct_faces, a two-ten hand is played as TEN+JACK, i.e. no pair.
+        # split_rank is the rank of the pair this hand was split from, or 0,
+        # and max_hands how many hands it may still become (None: no limit).
+        max_hands = self.rules.max_hands if max_hands is None and not split_rank else max_hands
+        key = (tuple(sorted(ranks)), upcard, counts, distinct_faces, split_rank, max_hands)
+        if key in self.cache:
+            return self.cache[key]
+
+        rules = self.rules
+        if distinct_faces:
+            hand = Hand([RANK_CARDS[10], OTHER_TEN])
+        else:
+            hand = Hand(RANK_CARDS[rank] for rank in ranks)
+
+        if split_rank == 1 and rules.split_aces_one_card:
+            ev = self.dealer.stand_ev(hand.value, upcard, counts)
+            self.cache[key] = ev
+            return ev
+
+        decision = self.player_strategy(hand, RANK_CARDS[upcard])
+        if decision == Decision.SURRENDER:
+            if rules.surrender and not split_rank and len(ranks) == 2:
+                self.cache[key] = -0.5
+                return -0.5
+            decision = Decision.HIT
+        if decision == Decision.SPLIT and max_hands is not None and max_hands < 2:
+            # Played as the pair's total, as in play_player_hand_with_rules.
+            hand.unpair()
+            decision = self.player_strategy(hand, RANK_CARDS[upcard])
+            if decision == Decision.SPLIT:
+                decision = basic_strategy(hand, RANK_CARDS[upcard])
+            if decision == Decision.SURRENDER:
+                decision = Decision.HIT
+        if decision == Decision.DOUBLE_DOWN and split_rank and not rules.double_after_split:
+            decision = Decision.HIT
+
+        if decision == Decision.STAND:
+            ev = self.dealer.stand_ev(hand.value, upcard, counts)
+        elif decision == Decision.HIT or decision == Decision.DOUBLE_DOWN:
+            ev = 0.0
+            total = sum(counts)
+            for rank in range(1, 11):
+                count = counts[rank - 1]
+                if not count:
+                    continue
+                new_hand = hand.copy()
+                new_hand.append(RANK_CARDS[rank])
+                remaining = remove_card(counts, rank)
+                if new_hand.value > 21:
+                    outcome = -1.0
+                elif decision == Decision.HIT:
+                    outcome = self.hand_ev(ranks + (rank,), upcard, remaining, split_rank=split_rank, max_hands=1)
+                else:
+                    outcome = self.dealer.stand_ev(new_hand.value, upcard, remaining)
+                ev += count / total * outcome
+            if decision == Decision.DOUBLE_DOWN:
+                ev *= 2
+        else:
+            assert decision == Decision.SPLIT
+            assert hand.is_pair, "Hand must contain only two cards of the same value!"
+            first_hands, second_hands = split_hands(max_hands)
+            ev = (
+                self.split_hand_ev(ranks[0], upcard, counts, first_hands)
+                + self.split_hand_ev(ranks[0], upcard, counts, second_hands)
+            )
+            if ranks[0] == 10:
+                # The game only splits two tens of the same face.
+                same_face = ten_pair_probability(counts)
+                ev = same_face * ev + (1 - same_face) * self.hand_ev(
+                    ranks, upcard, counts, distinct_faces=True, split_rank=split_rank, max_hands=max_hands
+                )
+
+        self.cache[key] = ev
+        return ev
+
+    def split_hand_ev(self, rank: int, upcard: int, counts: Counts, max_hands: Optional[int] = None) -> float:
+        ev = 0.0
+        total = sum(counts)
+        for drawn in range(1, 11):
+            count = counts[drawn - 1]
+            if count:
+                ev += count / total * self.hand_ev(
+                    (rank, drawn), upcard, remove_card(counts, drawn), split_rank=rank, max_hands=max_hands
+                )
+        return ev
+
+    def dealt_ev(self, ranks: Tuple[int, int], upcard: int, counts: Counts) -> float:
+        # A freshly dealt hand, settling naturals the way play_with_rules
+        # does. `counts` are the cards the dealer's hole card can be.
+        rules = self.rules
+        player_natural = set(ranks) == {1, 10}
+        dealer_natural = self.dealer.natural_probability(upcard, counts)
+        if player_natural and rules.blackjack_payout is not None:
+            return (1 - dealer_natural) * rules.blackjack_payout
+        played = self.hand_ev(ranks, upcard, counts)
+        if rules.dealer_peeks:
+            # The hand is only played when the dealer has no natural.
+            return dealer_natural * (0.0 if player_natural else -1.0) + (1 - dealer_natural) * played
+        return played
+
+    def round_ev(self, counts: Counts) -> float:
+        # Deals player card, dealer upcard, player card from `counts`.
+        ev = 0.0
+        total = sum(counts)
+        for first in range(1, 11):
+            p_first = counts[first - 1] / total
+            if not p_first:
+                continue
+            after_first = remove_card(counts, first)
+            for upcard in range(1, 11):
+                p_upcard = after_first[upcard - 1] / (total - 1)
+                if not p_upcard:
+                    continue
+                after_upcard = remove_card(after_first, upcard)
+                for second in range(1, 11):
+                    p_second = after_upcard[second - 1] / (total - 2)
+                    if not p_second:
+                        continue
+                    ev += p_first * p_upcard * p_second * self.dealt_ev(
+                        (first, second), upcard, remove_card(after_upcard, second)
+                    )
+        return ev
+
+def expected_value(
+    player_strategy: Callable, num_decks: int, dealer: DealerOutcomeCache = s17_dealer_outcomes,
+    rules: Rules = DEFAULT_RULES
+) -> float:
+    return EVCalculator(player_strategy, dealer, rules).round_ev(shoe_counts(num_decks))
@@ -1,19 +1,54 @@
-import random
 from utils import *
 from player import *
-from typing import Callable, List
+from shoe import *
+from dealer import *
+from profiling import GameProfiler
+from rules import Rules, DEFAULT_RULES
+from history import HandHistoryWriter
+from decision_stats import DecisionStats
+import functools
+from typing import Callable, List, Optional
 from tqdm import tqdm
 
-CARDS_PER_DECK = 52
-
 class BlackjackGame:
     def __init__(
-        self, num_decks: int, dealer_strategy: Callable, player_strategy: Callable
+        self, num_decks: int, dealer_strategy: Callable, player_strategy: Callable,
+        shoe: Optional[Shoe] = None, profiler: Optional[GameProfiler] = None,
+        rules: Rules = DEFAULT_RULES, history: Optional[HandHistoryWriter] = None,
+        deal: bool = True
     ):
         self.num_decks = num_decks
-        self.RESET_CUTOFF = int(CARDS_PER_DECK * num_decks * 0.2)
-        self.reset()
+        self.player_strategy = player_strategy
+        self.rules = rules
+
+        # Rules are resolved here, once, into the methods the round is played
+        # with, so nothing checks them per card. The default rules keep the
+        # original play/play_player_hand.
+        self.dealer_strategy = dealer_strategy
+        if rules is not DEFAULT_RULES:
+            self.dealer_strategy = rules.resolve_dealer_strategy(dealer_strategy)
+            if not rules.plain_naturals or not rules.plain_hands:
+                self.play = self.play_with_rules
+            if not rules.plain_hands:
+                self.play_player_hand = self.play_player_hand_with_rules
 
+        # Without a shared shoe, every game gets a fresh one. A LazyShoe only
+        # shuffles as it deals, so a fresh shoe costs the same at any size.
+        if shoe is None:
+            shoe = LazyShoe(num_decks) if profiler is None else profiler.timed("reset", LazyShoe)(num_decks)
+        self.shoe = shoe
+        self.RESET_CUTOFF = shoe.RESET_CUTOFF
+
+        if profiler is not None:
+            profiler.instrument(self)
+        if history is not None:
+            history.instrument(self)
+        # With deal=False the game only plays hands it is handed, e.g. for a
+        # seat at a table.BlackjackTable.
+        if deal:
+            self.deal()
+
+    def deal(self):
         player_first = self.draw_card()
         self.dealer_showing = self.draw_card()
         player_second = self.draw_card()
@@ -21,28 +56,25 @@ class BlackjackGame:
 
         # print("Dealer showing:", self.dealer_showing)
 
-        self.player_cards = [player_first, player_second]
-        self.dealer_cards = [self.dealer_showing, dealer_hidden]
-
-        self.dealer_strategy = dealer_strategy
-        self.player_strategy = player_strategy
+        self.player_cards = Hand([player_first, player_second])
+        self.dealer_cards = Hand([self.dealer_showing, dealer_hidden])
 
     def reset(self):
-        self.deck = [
-            Card(suite=suite, value=value)
-            for suite in Suite
-            for value in Value
-            for _ in range(self.num_decks)
-        ]
-
-        random.shuffle(self.deck)
+        self.shoe.shuffle()
 
     def draw_card(self):
-        assert len(self.deck) > 0, "There must be cards in a deck to draw from it!"
-        return self.deck.pop()
+        return self.shoe.draw_card()
+
+    def dealer_outcomes(self, cache: DealerOutcomeCache = s17_dealer_outcomes):
+        # The dealer's final-total distribution as the player sees it: the hole
+        # card is still unseen, so it counts as part of the shoe.
+        counts = list(self.shoe.counts())
+        counts[self.dealer_cards[1].rank - 1] += 1
+        return cache.get(self.dealer_showing.rank, tuple(counts))
 
     def play(self, bet_amount: int) -> int:
         player_hand_outcomes = self.play_player_hand(self.player_cards.copy(), self.dealer_showing, bet_amount)
+        self.player_hand_outcomes = player_hand_outcomes
         # print("Player hand outcomes:", player_hand_outcomes)
 
         money_won = -1 * sum(outcome.money_bet for outcome in player_hand_outcomes)
@@ -68,12 +100,57 @@ class BlackjackGame:
         # print("Player wins:", money_won)
         return money_won
 
-    def play_player_hand(self, player_cards: List[Card], dealer_showing: Card, bet_amount: int) -> List[HandOutcome]:
+    def play_with_rules(self, bet_amount: int) -> int:
+        # play() for any rules but the defaults: handles naturals, the dealer
+        # peek and surrendered hands.
+        rules = self.rules
+        payout = rules.blackjack_payout
+        player_natural = self.player_cards.value == 21
+        dealer_natural = self.dealer_cards.value == 21
+
+        if dealer_natural and rules.dealer_peeks:
+            self.player_hand_outcomes = [HandOutcome(
+                cards=self.player_cards.copy(), value=self.player_cards.value, money_bet=bet_amount
+            )]
+            return 0 if player_natural else -bet_amount
+
+        if player_natural and payout is not None:
+            self.player_hand_outcomes = [HandOutcome(
+                cards=self.player_cards.copy(), value=21, money_bet=bet_amount
+            )]
+            return 0 if dealer_natural else bet_amount * payout
+
+        self.num_hands = 1
+        player_hand_outcomes = self.play_player_hand(self.player_cards.copy(), self.dealer_showing, bet_amount)
+        self.player_hand_outcomes = player_hand_outcomes
+
+        money_won = 0
+        for outcome in player_hand_outcomes:
+            money_won -= outcome.money_bet / 2 if outcome.surrendered else outcome.money_bet
+
+        # An unpeeked dealer natural takes every bet still on the table.
+        if dealer_natural and payout is not None:
+            return money_won
+        if all(outcome.value > 21 or outcome.surrendered for outcome in player_hand_outcomes):
+            return money_won
+
+        dealer_value = self.play_dealer_hand(self.dealer_cards.copy())
+        for outcome in player_hand_outcomes:
+            if outcome.value > 21 or outcome.surrendered:
+                continue
+            if dealer_value > 21 or outcome.value > dealer_value:
+                money_won += outcome.money_bet * 2
+            elif outcome.value == dealer_value:
+                money_won += outcome.money_bet
+        return money_won
+
+    def play_player_hand(self, player_cards: Hand, dealer_showing: Card, bet_amount: int) -> List[HandOutcome]:
         decision = self.player_strategy(player_cards, dealer_showing)
         # print("Decision =", decision)
-        while decision == Decision.HIT:
+        # There's no surrender under the default rules, so it's played as a hit.
+        while decision == Decision.HIT or decision == Decision.SURRENDER:
             player_cards.append(self.draw_card())
-            hand_value = calculate_hand_value(player_cards)
+            hand_value = player_cards.value
             if hand_value > 21:
                 return [HandOutcome(
                     cards=player_cards,
@@ -84,7 +161,7 @@ class BlackjackGame:
             # print("Decision =", decision)
 
         if decision == Decision.STAND:
-            hand_value = calculate_hand_value(player_cards)
+            hand_value = player_cards.value
             return [HandOutcome(
                 cards=player_cards,
                 value=hand_value,
@@ -95,40 +172,183 @@ class BlackjackGame:
             player_cards.append(new_card)
             return [HandOutcome(
                 cards=player_cards,
-                value = calculate_hand_value(player_cards),
+                value = player_cards.value,
                 money_bet=bet_amount * 2
             )]
         else:
             assert decision == Decision.SPLIT
-            assert len(player_cards) == 2 and player_cards[0].value == player_cards[1].value, "Hand must contain only two cards of the same value!"
+            assert player_cards.is_pair, "Hand must contain only two cards of the same value!"
 
-            first_half = self.play_player_hand([player_cards[0], self.draw_card()], self.dealer_showing, bet_amount)
-            second_half = self.play_player_hand([player_cards[1], self.draw_card()], self.dealer_showing, bet_amount)
+            first_half = self.play_player_hand(Hand([player_cards[0], self.draw_card()]), self.dealer_showing, bet_amount)
+            second_half = self.play_player_hand(Hand([player_cards[1], self.draw_card()]), self.dealer_showing, bet_amount)
 
             return first_half + second_half
 
-    def play_dealer_hand(self, dealer_cards: List[Card]) -> int:
+    def play_player_hand_with_rules(
+        self, player_cards: Hand, dealer_showing: Card, bet_amount: int, split_rank: int = 0
+    ) -> List[HandOutcome]:
+        # play_player_hand for restricted rules. split_rank is the rank of the
+        # pair this hand was split from, or 0 for the original hand. Decisions
+        # the rules don't allow here fall back the way strategy tables usually
+        # mean them: DOUBLE_DOWN and SURRENDER become HIT, and SPLIT asks the
+        # strategy again about the pair as its ordinary total, falling back to
+        # the basic strategy table's hard or soft row if it still says SPLIT.
+        rules = self.rules
+        if split_rank == 1 and rules.split_aces_one_card:
+            return [HandOutcome(cards=player_cards, value=player_cards.value, money_bet=bet_amount)]
+
+        decision = self.player_strategy(player_cards, dealer_showing)
+        if decision == Decision.SURRENDER and rules.surrender and not split_rank:
+            return [HandOutcome(
+                cards=player_cards, value=player_cards.value, money_bet=bet_amount, surrendered=True
+            )]
+
+        while True:
+            if decision == Decision.HIT or decision == Decision.SURRENDER:
+                player_cards.append(self.draw_card())
+                if player_cards.value > 21:
+                    return [HandOutcome(cards=player_cards, value=player_cards.value, money_bet=bet_amount)]
+                decision = self.player_strategy(player_cards, dealer_showing)
+            elif decision == Decision.STAND:
+                return [HandOutcome(cards=player_cards, value=player_cards.value, money_bet=bet_amount)]
+            elif decision == Decision.DOUBLE_DOWN:
+                if split_rank and not rules.double_after_split:
+                    decision = Decision.HIT
+                    continue
+                player_cards.append(self.draw_card())
+                return [HandOutcome(cards=player_cards, value=player_cards.value, money_bet=bet_amount * 2)]
+            else:
+                assert decision == Decision.SPLIT
+                assert player_cards.is_pair, "Hand must contain only two cards of the same value!"
+                if self.num_hands == rules.max_hands or (split_rank == 1 and rules.split_aces_one_card):
+                    player_cards.unpair()
+                    decision = self.player_strategy(player_cards, dealer_showing)
+                    if decision == Decision.SPLIT:
+                        # Strategies that spot pairs from the cards still
+                        # see one; the hand plays its hard or soft total.
+                        decision = basic_strategy(player_cards, dealer_showing)
+                    continue
+
+                self.num_hands += 1
+                rank = player_cards[0].rank
+                first_half = self.play_player_hand(Hand([player_cards[0], self.draw_card()]), dealer_showing, bet_amount, rank)
+                second_half = self.play_player_hand(Hand([player_cards[1], self.draw_card()]), dealer_showing, bet_amount, rank)
+                return first_half + second_half
+
+    def play_dealer_hand(self, dealer_cards: Hand) -> int:
         decision = self.dealer_strategy(dealer_cards)
         while decision == Decision.HIT:
             dealer_cards.append(self.draw_card())
             decision = self.dealer_strategy(dealer_cards)
 
         # print("Dealer cards:", dealer_cards)
-        return calculate_hand_value(dealer_cards)
+        return dealer_cards.value
+
+class RecordingGame(BlackjackGame):
+    # A BlackjackGame feeding a DecisionStats, for sessions that tally
+    # decisions. Its player strategy must come from
+    # DecisionStats.recording_strategy. Splits recurse through
+    # play_player_hand, so every hand records the range of cells decided
+    # while it was played; the overrides cover both the default and the
+    # rules-resolved play methods.
+    def __init__(self, *args, decision_stats: DecisionStats, **kwargs):
+        self.decision_stats = decision_stats
+        super().__init__(*args, **kwargs)
+
+    def play(self, bet_amount: int) -> int:
+        money_won = BlackjackGame.play(self, bet_amount)
+        self.decision_stats.record_round(money_won, bet_amount)
+        return money_won
+
+    def play_with_rules(self, bet_amount: int) -> int:
+        money_won = BlackjackGame.play_with_rules(self, bet_amount)
+        self.decision_stats.record_round(money_won, bet_amount)
+        return money_won
+
+    def play_player_hand(self, player_cards: Hand, dealer_showing: Card, bet_amount: int) -> List[HandOutcome]:
+        cells = self.decision_stats.cells
+        start = len(cells)
+        outcomes = BlackjackGame.play_player_hand(self, player_cards, dealer_showing, bet_amount)
+        self.decision_stats.hands.append((start, len(cells), outcomes))
+        return outcomes
+
+    def play_player_hand_with_rules(
+        self, player_cards: Hand, dealer_showing: Card, bet_amount: int, split_rank: int = 0
+    ) -> List[HandOutcome]:
+        cells = self.decision_stats.cells
+        start = len(cells)
+        outcomes = BlackjackGame.play_player_hand_with_rules(self, player_cards, dealer_showing, bet_amount, split_rank)
+        self.decision_stats.hands.append((start, len(cells), outcomes))
+        return outcomes
+
+    def play_dealer_hand(self, dealer_cards: Hand) -> int:
+        dealer_value = BlackjackGame.play_dealer_hand(self, dealer_cards)
+        self.decision_stats.dealer_value = dealer_value
+        return dealer_value
+
+class BlackjackSession:
+    # Plays many rounds from one long-lived shoe, reshuffling only once the
+    # shoe has been dealt down to its RESET_CUTOFF.
+    def __init__(
+        self, num_decks: int, dealer_strategy: Callable, player_strategy: Callable,
+        rng=None, profiler: Optional[GameProfiler] = None, shoe: Optional[Shoe] = None,
+        rules: Rules = DEFAULT_RULES, penetration: float = DEFAULT_PENETRATION,
+        history: Optional[HandHistoryWriter] = None, shoe_class: type = Shoe,
+        decision_stats: Optional[DecisionStats] = None
+    ):
+        self.num_decks = num_decks
+        self.dealer_strategy = dealer_strategy
+        self.player_strategy = player_strategy
+        self.profiler = profiler
+        self.rules = rules
+        self.history = history
+        # Tallying decisions is resolved here, once: the session's strategy is
+        # wrapped and its rounds are dealt as RecordingGames.
+        self.decision_stats = decision_stats
+        self.game_class = BlackjackGame
+        if decision_stats is not None:
+            self.player_strategy = decision_stats.recording_strategy(player_strategy)
+            self.game_class = functools.partial(RecordingGame, decision_stats=decision_stats)
+        self.shoe = shoe if shoe is not None else shoe_class(num_decks, rng=rng, penetration=penetration)
+        if profiler is not None:
+            self.shoe.shuffle = profiler.timed("reset", self.shoe.shuffle)
+        self.rounds_played = 0
+        self.hands_played = 0
+        self.money_bet = 0
+
+    def round_bet(self, bet_amount: int) -> int:
+        # What to bet this round, once the shoe is ready for it.
+        return bet_amount
+
+    def play_round(self, bet_amount: int) -> int:
+        self.shoe.shuffle_if_needed()
+        bet_amount = self.round_bet(bet_amount)
+        game = self.game_class(
+            self.num_decks, self.dealer_strategy, self.player_strategy, shoe=self.shoe,
+            profiler=self.profiler, rules=self.rules, history=self.history
+        )
+        money_won = game.play(bet_amount)
+        self.rounds_played += 1
+        self.hands_played += len(game.player_hand_outcomes)
+        self.money_bet += bet_amount
+        return money_won
 
 if __name__ == "__main__":
+    from runner import run_simulation
+
     BUY_IN = 10
     NUM_RUNS = 100_000
 
-    money_won = 0
-    for _ in tqdm(range(NUM_RUNS)):
-        game = BlackjackGame(
-            num_decks=6,
-            dealer_strategy=dealer_strategy,
-            player_strategy=player_strategy # swap this to change the player strategy
-        )
-
-        money_won += game.play(BUY_IN)
+    result = run_simulation(
+        num_rounds=NUM_RUNS,
+        num_decks=6,
+        dealer_strategy=dealer_strategy,
+        player_strategy=player_strategy, # swap this to change the player strategy
+        bet_amount=BUY_IN,
+        seed=0,
+    )
+    money_won = result.money_won
+    NUM_RUNS = result.rounds_played
 
     winnings_per_round = money_won / NUM_RUNS
 
@@ -145,3 +365,4 @@ if __name__ == "__main__":
     else:
         edge = -1 * winnings_per_round / BUY_IN * 100
         print(f"This is a -{edge:.2f}% edge")
+    print(f"95% confidence interval: ±{result.edge_half_width(BUY_IN) * 100:.2f}%")
@@ -0,0 +1,148 @@
+import numpy as np
+from typing import List
+from utils import *
+
+# One fixed-width record per player hand. Cards are utils.CARDS ids (one
+# byte each, so suits survive for auditing) padded with NO_CARD; use
+# card_ranks() for compact ranks. Every hand of a round carries the round's
+# total money won, since naturals, peeks and surrender settle the round as
+# a whole. dealer_value is 0 when the dealer didn't need to play.
+MAX_CARDS = 22
+NO_CARD = 0xFF
+SURRENDERED = 1
+
+RECORD_DTYPE = np.dtype([
+    ("round", "<u4"),
+    ("round_won", "<f4"),
+    ("bet", "<u4"),
+    ("hand", "u1"),
+    ("num_hands", "u1"),
+    ("value", "u1"),
+    ("dealer_value", "u1"),
+    ("flags", "u1"),
+    ("num_cards", "u1"),
+    ("cards", "u1", (MAX_CARDS,)),
+    ("num_dealer_cards", "u1"),
+    ("dealer_cards", "u1", (MAX_CARDS,)),
+    ("num_decisions", "u1"),
+    ("decisions", "u1", (MAX_CARDS,)),
+])
+
+MAGIC = b"BJHIST01"
+HEADER_SIZE = 16
+
+RANK_LOOKUP = np.zeros(256, dtype=np.uint8)
+RANK_LOOKUP[:len(CARDS)] = np.frombuffer(CARD_RANKS, dtype=np.uint8)
+
+def card_ranks(cards: np.ndarray) -> np.ndarray:
+    # Compact ranks for an array of card ids, with 0 for padding.
+    return RANK_LOOKUP[cards]
+
+
+class HandHistoryWriter:
+    # Streams every round a game plays to `path`. Records are staged in
+    # memory and written with one tofile() call per `buffer_size` records.
+    # Like GameProfiler, a game is only wrapped (at construction) when it is
+    # handed a writer, so nothing changes for games without one.
+    def __init__(self, path: str, buffer_size: int = 1 << 16):
+        self.file = open(path, "wb")
+        self.file.write(MAGIC + RECORD_DTYPE.itemsize.to_bytes(8, "little"))
+        self.buffer_size = buffer_size
+        self.pending = []
+        self.rounds = 0
+
+    def instrument(self, game):
+        # Decisions are logged against the Hand object they were made for, so
+        # they can be matched up with the hand outcomes after the round. A
+        # split hand starts with the decisions of the hand it was split from,
+        # the SPLIT included, so every hand's record shows how it came about.
+        decisions = {}
+        hands_in_play = []
+        player_strategy = game.player_strategy
+        def recording_player_strategy(player_cards, dealer_showing):
+            decision = player_strategy(player_cards, dealer_showing)
+            decisions[id(player_cards)].append(decision.value)
+            return decision
+        game.player_strategy = recording_player_strategy
+
+        # Splits recurse through game.play_player_hand, so the hand being
+        # played when a new one starts is the one it was split from.
+        play_player_hand = game.play_player_hand
+        def recording_play_player_hand(player_cards, *args, **kwargs):
+            decisions[id(player_cards)] = list(decisions[id(hands_in_play[-1])]) if hands_in_play else []
+            hands_in_play.append(player_cards)
+            try:
+                return play_player_hand(player_cards, *args, **kwargs)
+            finally:
+                hands_in_play.pop()
+        game.play_player_hand = recording_play_player_hand
+
+        dealer_hands = []
+        play_dealer_hand = game.play_dealer_hand
+        def recording_play_dealer_hand(dealer_cards):
+            dealer_hands.append(dealer_cards)
+            return play_dealer_hand(dealer_cards)
+        game.play_dealer_hand = recording_play_dealer_hand
+
+        play = game.play
+        def recording_play(bet_amount):
+            money_won = play(bet_amount)
+            dealer_cards = dealer_hands[0] if dealer_hands else game.dealer_cards
+            self.record_round(
+                game.player_hand_outcomes, decisions, dealer_cards,
+                dealer_cards.value if dealer_hands else 0, money_won
+            )
+            return money_won
+        game.play = recording_play
+
+    def record_round(
+        self, outcomes: List[HandOutcome], decisions: dict, dealer_cards: List[Card],
+        dealer_value: int, money_won
+    ):
+        dealer_ids = [CARD_IDS[card.suite, card.value] for card in dealer_cards]
+        assert len(dealer_ids) <= MAX_CARDS, "Too many dealer cards to record!"
+        dealer_ids += [NO_CARD] * (MAX_CARDS - len(dealer_ids))
+        num_dealer_cards = len(dealer_cards)
+        for hand, outcome in enumerate(outcomes):
+            card_ids = [CARD_IDS[card.suite, card.value] for card in outcome.cards]
+            hand_decisions = decisions.get(id(outcome.cards), [])
+            assert len(card_ids) <= MAX_CARDS, "Too many cards in a hand to record!"
+            self.pending.append((
+                self.rounds, money_won, outcome.money_bet, hand, len(outcomes), outcome.value,
+                dealer_value, SURRENDERED if outcome.surrendered else 0,
+                len(card_ids), card_ids + [NO_CARD] * (MAX_CARDS - len(card_ids)),
+                num_dealer_cards, dealer_ids,
+                len(hand_decisions), hand_decisions + [0] * (MAX_CARDS - len(hand_decisions)),
+            ))
+        self.rounds += 1
+        if len(self.pending) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        # Records are converted and written in bulk, one tofile() per buffer.
+        if self.pending:
+            np.array(self.pending, dtype=RECORD_DTYPE).tofile(self.file)
+            self.pending = []
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_history(path: str) -> np.ndarray:
+    # Memory-maps a history file as a structured array of RECORD_DTYPE, so
+    # fields like records["round_won"] are read straight from disk.
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    assert header[:len(MAGIC)] == MAGIC, f"{path} is not a hand history file!"
+    assert int.from_bytes(header[len(MAGIC):], "little") == RECORD_DTYPE.itemsize, \
+        f"{path} was written with a different record layout!"
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE)
@@ -0,0 +1,153 @@
+import random
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+from utils import *
+from shoe import *
+from strategy_table import state_index
+
+@dataclass
+class DecisionBatch:
+    # Every hand waiting on a player decision in one lockstep step. `states`
+    # are strategy_table.state_index values and `upcards` compact ranks, for
+    # table- or model-backed strategies; `hands` and `dealer_showing` carry
+    # the cards themselves for strategies that need them.
+    states: List[int]
+    upcards: List[int]
+    hands: List[Hand]
+    dealer_showing: List[Card]
+
+
+class ScalarPlayerStrategy:
+    # Adapts a player_strategy(player_cards, dealer_showing) callback to the
+    # batched decide_batch protocol.
+    def __init__(self, player_strategy: Callable):
+        self.player_strategy = player_strategy
+
+    def decide_batch(self, batch: DecisionBatch) -> List[Decision]:
+        player_strategy = self.player_strategy
+        return [player_strategy(hand, upcard) for hand, upcard in zip(batch.hands, batch.dealer_showing)]
+
+
+class ScalarDealerStrategy:
+    # Adapts a dealer_strategy(dealer_cards) callback to the batched protocol,
+    # where the dealer is asked about many hands at once.
+    def __init__(self, dealer_strategy: Callable):
+        self.dealer_strategy = dealer_strategy
+
+    def decide_batch(self, hands: Sequence[Hand]) -> List[Decision]:
+        dealer_strategy = self.dealer_strategy
+        return [dealer_strategy(hand) for hand in hands]
+
+
+def as_batched(strategy, adapter: type):
+    return strategy if hasattr(strategy, "decide_batch") else adapter(strategy)
+
+
+class LockstepTables:
+    # Plays one round on each of many independent tables at once, asking the
+    # strategies for every pending decision across all tables in one call.
+    # Each table has its own long-lived shoe and deals and draws in the same
+    # order as BlackjackGame, so a table plays exactly the round a
+    # BlackjackSession with the same shoe would. Tables play the default
+    # rules (rules.DEFAULT_RULES), under which SURRENDER is played as a hit.
+    def __init__(
+        self, num_tables: int, num_decks: int, dealer_strategy, player_strategy,
+        rng: Optional[random.Random] = None
+    ):
+        rng = rng if rng is not None else random.Random()
+        self.shoes = [Shoe(num_decks, rng=random.Random(rng.getrandbits(64))) for _ in range(num_tables)]
+        self.dealer_strategy = as_batched(dealer_strategy, ScalarDealerStrategy)
+        self.player_strategy = as_batched(player_strategy, ScalarPlayerStrategy)
+        self.rounds_played = 0
+        self.hands_played = 0
+        self.money_bet = 0
+
+    def play_round(self, bet_amount: int) -> List[int]:
+        num_tables = len(self.shoes)
+        dealer_showing = []
+        dealer_cards = []
+        active = []
+        for shoe in self.shoes:
+            shoe.shuffle_if_needed()
+            player_first = shoe.draw_card()
+            showing = shoe.draw_card()
+            player_second = shoe.draw_card()
+            dealer_showing.append(showing)
+            dealer_cards.append(Hand([showing, shoe.draw_card()]))
+            active.append(Hand([player_first, player_second]))
+
+        # Second halves of splits wait here until the table's current hand is
+        # done, then are played last-in first-out like the recursive engine.
+        pending: List[List[Card]] = [[] for _ in range(num_tables)]
+        outcomes: List[List[HandOutcome]] = [[] for _ in range(num_tables)]
+        playing = list(range(num_tables))
+
+        while playing:
+            hands = [active[table] for table in playing]
+            showing = [dealer_showing[table] for table in playing]
+            decisions = self.player_strategy.decide_batch(DecisionBatch(
+                states=[state_index(hand) for hand in hands],
+                upcards=[card.rank for card in showing],
+                hands=hands,
+                dealer_showing=showing,
+            ))
+
+            still_playing = []
+            for table, hand, decision in zip(playing, hands, decisions):
+                shoe = self.shoes[table]
+                bet = bet_amount
+                if decision == Decision.HIT or decision == Decision.SURRENDER:
+                    hand.append(shoe.draw_card())
+                    if hand.value <= 21:
+                        still_playing.append(table)
+                        continue
+                elif decision == Decision.DOUBLE_DOWN:
+                    hand.append(shoe.draw_card())
+                    bet = bet_amount * 2
+                elif decision == Decision.SPLIT:
+                    assert hand.is_pair, "Hand must contain only two cards of the same value!"
+                    pending[table].append(hand[1])
+                    active[table] = Hand([hand[0], shoe.draw_card()])
+                    still_playing.append(table)
+                    continue
+                else:
+                    assert decision == Decision.STAND
+
+                outcomes[table].append(HandOutcome(cards=hand, value=hand.value, money_bet=bet))
+                if pending[table]:
+                    active[table] = Hand([pending[table].pop(), shoe.draw_card()])
+                    still_playing.append(table)
+            playing = still_playing
+
+        # If the player busts on every hand, there's no need to run the dealer's hand.
+        dealing = [
+            table for table in range(num_tables)
+            if not all(outcome.value > 21 for outcome in outcomes[table])
+        ]
+        while dealing:
+            decisions = self.dealer_strategy.decide_batch([dealer_cards[table] for table in dealing])
+            still_dealing = []
+            for table, decision in zip(dealing, decisions):
+                if decision == Decision.HIT:
+                    dealer_cards[table].append(self.shoes[table].draw_card())
+                    still_dealing.append(table)
+            dealing = still_dealing
+
+        money_won = []
+        for table in range(num_tables):
+            dealer_value = dealer_cards[table].value
+            won = 0
+            for outcome in outcomes[table]:
+                won -= outcome.money_bet
+                if outcome.value > 21:
+                    continue
+                if dealer_value > 21 or outcome.value > dealer_value:
+                    won += outcome.money_bet * 2
+                elif outcome.value == dealer_value:
+                    won += outcome.money_bet
+            money_won.append(won)
+            self.hands_played += len(outcomes[table])
+
+        self.rounds_played += num_tables
+        self.money_bet += bet_amount * num_tables
+        return money_won
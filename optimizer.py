@@ -0,0 +1,229 @@
+import argparse
+import dataclasses
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations_with_replacement
+from math import factorial
+from typing import Dict, List, Optional, Tuple
+from utils import *
+from shoe import *
+from dealer import *
+from ev import DealerModel, check_modelled, split_hands
+from rules import Rules, DEFAULT_RULES
+from strategy_table import HARD_TOTALS, SOFT_TOTALS, PAIR_RANKS, UPCARD_RANKS
+
+# Value columns for each compact rank, so emitted tables match utils.py.
+RANK_VALUES = {rank: [value for value in Value if rank_map[value] == rank] for rank in range(1, 11)}
+PAIR_VALUES = {rank: RANK_VALUES[rank][0] for rank in PAIR_RANKS}
+
+def hand_value(ranks: Tuple[int, ...]) -> int:
+    hard_total = sum(ranks)
+    return hard_total + 10 if 1 in ranks and hard_total <= 11 else hard_total
+
+
+class StrategySolver:
+    # Finds the EV-maximizing play for hands against one shoe composition,
+    # assuming optimal (composition-dependent) play on every later decision.
+    # Plays hands the way BlackjackGame does under `rules`, with the same
+    # dealer model and split limit sharing as ev.EVCalculator.
+    def __init__(self, counts: Counts, rules: Rules = DEFAULT_RULES):
+        self.counts = counts
+        self.rules = rules
+        self.dealer = DealerModel(rules=rules)
+        self.cache: Dict[tuple, float] = {}
+
+    def action_evs(
+        self, ranks: Tuple[int, ...], upcard: int, counts: Counts,
+        split_rank: int = 0, max_hands: Optional[int] = None
+    ) -> Dict[Decision, float]:
+        # `counts` excludes the hand's cards and the dealer's upcard.
+        # split_rank and max_hands are as in EVCalculator.hand_ev, except
+        # that an unsplit hand's max_hands is taken as given.
+        rules = self.rules
+        value = hand_value(ranks)
+        evs = {Decision.STAND: self.dealer.stand_ev(value, upcard, counts)}
+        if split_rank == 1 and rules.split_aces_one_card:
+            return evs
+
+        total = sum(counts)
+        hit = 0.0
+        double = 0.0
+        for rank in range(1, 11):
+            count = counts[rank - 1]
+            if not count:
+                continue
+            new_ranks = ranks + (rank,)
+            new_value = hand_value(new_ranks)
+            if new_value > 21:
+                hit -= count / total
+                double -= count / total
+                continue
+            remaining = remove_card(counts, rank)
+            hit += count / total * self.best_ev(new_ranks, upcard, remaining, split_rank, 1)
+            double += count / total * self.dealer.stand_ev(new_value, upcard, remaining)
+
+        evs[Decision.HIT] = hit
+        if not split_rank or rules.double_after_split:
+            evs[Decision.DOUBLE_DOWN] = 2 * double
+        if rules.surrender and not split_rank and len(ranks) == 2:
+            evs[Decision.SURRENDER] = -0.5
+        if len(ranks) == 2 and ranks[0] == ranks[1] and (max_hands is None or max_hands >= 2):
+            split = 0.0
+            for half_hands in split_hands(max_hands):
+                for rank in range(1, 11):
+                    count = counts[rank - 1]
+                    if count:
+                        split += count / total * self.best_ev(
+                            (ranks[0], rank), upcard, remove_card(counts, rank), ranks[0], half_hands
+                        )
+            evs[Decision.SPLIT] = split
+        return evs
+
+    def best_ev(
+        self, ranks: Tuple[int, ...], upcard: int, counts: Counts,
+        split_rank: int = 0, max_hands: Optional[int] = None
+    ) -> float:
+        key = (tuple(sorted(ranks)), upcard, counts, split_rank, max_hands)
+        ev = self.cache.get(key)
+        if ev is None:
+            ev = max(self.action_evs(ranks, upcard, counts, split_rank, max_hands).values())
+            self.cache[key] = ev
+        return ev
+
+    def cell_evs(self, hands: List[Tuple[int, ...]], upcard: int) -> Dict[Decision, float]:
+        # Action EVs for a table cell, averaged over the starting hands that
+        # land in it, weighted by how likely each is against this upcard.
+        after_upcard = remove_card(self.counts, upcard)
+        totals: Dict[Decision, float] = {}
+        total_weight = 0.0
+        for ranks in hands:
+            # Number of deal orders for this multiset, times the chance of each.
+            weight = float(factorial(len(ranks)))
+            for rank in set(ranks):
+                weight /= factorial(ranks.count(rank))
+            remaining = after_upcard
+            for rank in ranks:
+                weight *= remaining[rank - 1]
+                if not remaining[rank - 1]:
+                    break
+                remaining = remove_card(remaining, rank)
+            if not weight:
+                continue
+            total_weight += weight
+            for decision, ev in self.action_evs(ranks, upcard, remaining, max_hands=self.rules.max_hands).items():
+                totals[decision] = totals.get(decision, 0.0) + weight * ev
+        return {decision: ev / total_weight for decision, ev in totals.items()}
+
+
+def starting_hands(kind: str, total: int) -> List[Tuple[int, ...]]:
+    # Representative hands for a cell: two-card hands where possible
+    # (preferring non-pairs for hard totals), otherwise three-card hands.
+    if kind == "pair":
+        return [(total, total)]
+    if kind == "soft":
+        return [(1, total - 11)]
+    two_cards = [
+        ranks for ranks in combinations_with_replacement(range(2, 11), 2) if sum(ranks) == total
+    ]
+    non_pairs = [ranks for ranks in two_cards if ranks[0] != ranks[1]]
+    if non_pairs:
+        return non_pairs
+    if two_cards:
+        return two_cards
+    return [ranks for ranks in combinations_with_replacement(range(2, 11), 3) if sum(ranks) == total]
+
+
+# One solver per worker process and configuration, so cells solved by the same
+# worker share every cached sub-result.
+_solvers: Dict[tuple, StrategySolver] = {}
+
+def solve_cells(counts: Counts, rules: Rules, upcard: int, kind: str) -> Dict[int, object]:
+    key = (counts, rules)
+    if key not in _solvers:
+        _solvers[key] = StrategySolver(counts, rules)
+    solver = _solvers[key]
+
+    cells = {}
+    totals = {"hard": HARD_TOTALS, "soft": SOFT_TOTALS, "pair": PAIR_RANKS}[kind]
+    for total in totals:
+        evs = solver.cell_evs(starting_hands(kind, total), upcard)
+        if kind == "pair":
+            # Under a max_hands of 1 there's no splitting at all.
+            split = evs.pop(Decision.SPLIT, None)
+            cells[total] = "Y" if split is not None and split > max(evs.values()) else "N"
+        else:
+            # A pair only reaches the hard/soft tables once it isn't split.
+            evs.pop(Decision.SPLIT, None)
+            cells[total] = max(evs, key=evs.get)
+    return cells
+
+
+def solve_basic_strategy(
+    num_decks: int, rules: Rules = DEFAULT_RULES, num_workers: Optional[int] = None
+) -> Tuple[dict, dict, dict]:
+    # Returns (hard_totals, soft_totals, pair_splitting) in the same format
+    # as utils.py, ready for compile_strategy. Rules that leave
+    # dealer_hits_soft_17 as None are solved for a dealer standing on soft 17,
+    # and rules the EV model doesn't cover raise ValueError.
+    check_modelled(rules)
+    counts = shoe_counts(num_decks)
+    tasks = [(upcard, kind) for kind in ("pair", "soft", "hard") for upcard in UPCARD_RANKS]
+
+    if num_workers == 1:
+        solved = [solve_cells(counts, rules, upcard, kind) for upcard, kind in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = [
+                executor.submit(solve_cells, counts, rules, upcard, kind)
+                for upcard, kind in tasks
+            ]
+            solved = [future.result() for future in futures]
+
+    tables = {"hard": {}, "soft": {}, "pair": {}}
+    for (upcard, kind), cells in zip(tasks, solved):
+        for total, decision in cells.items():
+            row = tables[kind].setdefault(PAIR_VALUES[total] if kind == "pair" else total, {})
+            for dealer_value in RANK_VALUES[upcard]:
+                row[dealer_value] = decision
+
+    def ordered(table: dict, keys) -> dict:
+        return {key: {value: table[key][value] for value in Value} for key in keys}
+
+    return (
+        ordered(tables["hard"], reversed(HARD_TOTALS)),
+        ordered(tables["soft"], reversed(SOFT_TOTALS)),
+        ordered(tables["pair"], [PAIR_VALUES[rank] for rank in (1, 10, 9, 8, 7, 6, 5, 4, 3, 2)]),
+    )
+
+
+def format_table(name: str, table: dict) -> str:
+    lines = [f"{name} = {{"]
+    for key, row in table.items():
+        key_text = f"Value.{key.name}" if isinstance(key, Value) else str(key)
+        lines.append(f"    {key_text}: {{")
+        for dealer_value, decision in row.items():
+            decision_text = f"Decision.{decision.name}" if isinstance(decision, Decision) else f'"{decision}"'
+            lines.append(f"        Value.{dealer_value.name}: {decision_text},")
+        lines.append("    },")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    from sweep import RULE_SETS
+
+    parser = argparse.ArgumentParser(description="Derive an EV-maximizing strategy table.")
+    parser.add_argument("--decks", type=int, default=6)
+    parser.add_argument("--rules", choices=sorted(RULE_SETS), default="default")
+    parser.add_argument("--h17", action="store_true", help="dealer hits soft 17, whatever the rule set says")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    rules = RULE_SETS[args.rules]
+    if args.h17:
+        rules = dataclasses.replace(rules, dealer_hits_soft_17=True)
+    solved_hard, solved_soft, solved_pairs = solve_basic_strategy(args.decks, rules, args.workers)
+    print(format_table("hard_totals", solved_hard))
+    print()
+    print(format_table("soft_totals", solved_soft))
+    print()
+    print(format_table("pair_splitting", solved_pairs))
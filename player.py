@@ -1,4 +1,5 @@
 from utils import *
+from strategy_table import *
 from typing import List
 import json
 
@@ -8,31 +9,23 @@ def dealer_strategy(dealer_cards: List[Card]):
         return Decision.HIT
     return Decision.STAND
 
+def dealer_strategy_h17(dealer_cards: List[Card]):
+    # Same as dealer_strategy, except the dealer also hits a soft 17.
+    hand_value = calculate_hand_value(dealer_cards)
+    if hand_value < 17:
+        return Decision.HIT
+    if hand_value == 17 and calculate_lowest_hand_value(dealer_cards) != 17:
+        return Decision.HIT
+    return Decision.STAND
+
 def player_copy_dealer(player_cards: List[Card], dealer_showing: Card):
     return dealer_strategy(player_cards)    
 
-def player_strategy(player_cards: List[Card], dealer_showing: Card):
-    if len(player_cards) == 2:
-        if player_cards[0].value == player_cards[1].value:
-            if (
-                player_cards[0].value in pair_splitting
-                and pair_splitting[player_cards[0].value][dealer_showing.value] == "Y"
-            ):
-                return Decision.SPLIT
-
-    hand_value = calculate_hand_value(player_cards)
-    lowest_hand_value = calculate_lowest_hand_value(player_cards)
+# The hand-entered tables, compiled once into a flat (state, upcard) lookup.
+basic_strategy = compile_strategy(hard_totals, soft_totals, pair_splitting)
 
-    # If you've already overshot 21 with aces as 11, then you should use the hard total table
-    # even though you have aces.
-    if any(card.value == Value.ACE for card in player_cards) and hand_value != lowest_hand_value:
-        if hand_value not in soft_totals:
-            return Decision.STAND 
-        return soft_totals[hand_value][dealer_showing.value]
-    else:
-        if hand_value not in hard_totals:
-            return Decision.STAND
-        return hard_totals[hand_value][dealer_showing.value]
+def player_strategy(player_cards: List[Card], dealer_showing: Card):
+    return basic_strategy(player_cards, dealer_showing)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,126 @@
+from collections import defaultdict
+from time import perf_counter
+from typing import Callable
+
+def callback_name(fn: Callable) -> str:
+    module = getattr(fn, "__module__", None)
+    name = getattr(fn, "__qualname__", None) or type(fn).__name__
+    return f"{module}.{name}" if module else name
+
+
+class GameProfiler:
+    # Opt-in per-phase wall time and call counters for BlackjackGame. Nothing
+    # is checked per card when profiling is off: a game only wraps its methods
+    # and strategies once, at construction, when it is handed a profiler.
+    #
+    # Phase times are inclusive, e.g. play_player_hand includes the strategy
+    # calls and draws made while playing the hand.
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.rounds = 0
+        self.hands = 0
+        self.split_depths = defaultdict(int)
+        # Rounds settled on naturals before any hand was played, which have
+        # no split depth.
+        self.natural_rounds = 0
+        self._depth = 0
+        self._max_depth = 0
+
+    def timed(self, name: str, fn: Callable) -> Callable:
+        seconds = self.seconds
+        calls = self.calls
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                seconds[name] += perf_counter() - start
+                calls[name] += 1
+
+        return wrapper
+
+    def instrument(self, game):
+        game.deal = self.timed("deal", game.deal)
+        game.draw_card = self.timed("draw_card", game.draw_card)
+        game.play_dealer_hand = self.timed("play_dealer_hand", game.play_dealer_hand)
+        game.player_strategy = self.timed(
+            f"player_strategy[{callback_name(game.player_strategy)}]", game.player_strategy
+        )
+        game.dealer_strategy = self.timed(
+            f"dealer_strategy[{callback_name(game.dealer_strategy)}]", game.dealer_strategy
+        )
+
+        # Splits recurse through game.play_player_hand, so wrapping it on the
+        # instance also lets us track how deep the splits go.
+        timed_play_player_hand = self.timed("play_player_hand", game.play_player_hand)
+        def play_player_hand(*args, **kwargs):
+            self._depth += 1
+            self._max_depth = max(self._max_depth, self._depth)
+            try:
+                return timed_play_player_hand(*args, **kwargs)
+            finally:
+                self._depth -= 1
+        game.play_player_hand = play_player_hand
+
+        timed_play = self.timed("play", game.play)
+        def play(*args, **kwargs):
+            self._max_depth = 0
+            money_won = timed_play(*args, **kwargs)
+            self.rounds += 1
+            self.hands += len(game.player_hand_outcomes)
+            if self._max_depth:
+                self.split_depths[self._max_depth - 1] += 1
+            else:
+                self.natural_rounds += 1
+            return money_won
+        game.play = play
+
+    def merge(self, other: "GameProfiler"):
+        for name, seconds in other.seconds.items():
+            self.seconds[name] += seconds
+        for name, calls in other.calls.items():
+            self.calls[name] += calls
+        for depth, rounds in other.split_depths.items():
+            self.split_depths[depth] += rounds
+        self.rounds += other.rounds
+        self.hands += other.hands
+        self.natural_rounds += other.natural_rounds
+
+    def to_dict(self) -> dict:
+        hands = self.hands or 1
+        player_strategy_calls = sum(
+            calls for name, calls in self.calls.items() if name.startswith("player_strategy")
+        )
+        return {
+            "rounds": self.rounds,
+            "hands": self.hands,
+            "phases": {
+                name: {
+                    "seconds": self.seconds[name],
+                    "calls": self.calls[name],
+                    "us_per_call": self.seconds[name] / self.calls[name] * 1e6,
+                }
+                for name in sorted(self.seconds, key=self.seconds.get, reverse=True)
+            },
+            "per_hand": {
+                "player_strategy_calls": player_strategy_calls / hands,
+                "cards_drawn": self.calls["draw_card"] / hands,
+            },
+            "split_depths": dict(sorted(self.split_depths.items())),
+            "natural_rounds": self.natural_rounds,
+        }
+
+    def report(self) -> str:
+        profile = self.to_dict()
+        lines = [f"{profile['rounds']} rounds, {profile['hands']} hands"]
+        for name, phase in profile["phases"].items():
+            lines.append(
+                f"  {name:56} {phase['seconds']:9.3f}s {phase['calls']:>11} calls {phase['us_per_call']:8.2f}us/call"
+            )
+        for name, value in profile["per_hand"].items():
+            lines.append(f"  {name} per hand: {value:.3f}")
+        lines.append(f"  rounds by split depth: {profile['split_depths']}")
+        lines.append(f"  rounds settled on naturals: {profile['natural_rounds']}")
+        return "\n".join(lines)
@@ -0,0 +1,68 @@
+import hashlib
+import random
+from typing import List
+import numpy as np
+
+# Shoes only need an object with a random.shuffle-compatible shuffle(), so a
+# random.Random works as is. NumpyRNG is the faster option: it shuffles a
+# shoe's bytearray in place through a NumPy view, about 9x faster than
+# random.shuffle on a six-deck shoe.
+RNG_BACKENDS = ("python", "numpy")
+UNIFORM_BLOCK_SIZE = 4096
+
+def derive_seed(seed: int, stream: int) -> int:
+    # Each chunk gets its own stream, so results only depend on the seed and
+    # the chunk size, never on how many workers happened to run them.
+    digest = hashlib.sha256(f"{seed}:{stream}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+class NumpyRNG:
+    # A PCG64 generator with the parts of the random.Random interface the
+    # simulator uses. Parallel streams come from jumped(), which advances the
+    # generator by i * 2**127 draws, so streams never overlap.
+    def __init__(self, seed=None, bit_generator: np.random.BitGenerator = None):
+        self.bit_generator = bit_generator if bit_generator is not None else np.random.PCG64(seed)
+        self.generator = np.random.Generator(self.bit_generator)
+        self.uniforms = []
+
+    def shuffle(self, x):
+        if isinstance(x, bytearray):
+            # A writable view, so the bytearray is shuffled in place.
+            self.generator.shuffle(np.frombuffer(x, dtype=np.uint8))
+        else:
+            self.generator.shuffle(x)
+
+    def random(self) -> float:
+        # Drawn in blocks, since one NumPy call per number would cost more
+        # than the number is worth (LazyShoe draws one per card).
+        if not self.uniforms:
+            self.uniforms = self.generator.random(UNIFORM_BLOCK_SIZE).tolist()
+        return self.uniforms.pop()
+
+    def randrange(self, stop: int) -> int:
+        return int(self.generator.integers(stop))
+
+    def getrandbits(self, k: int) -> int:
+        return int.from_bytes(self.generator.bytes((k + 7) // 8), "little") >> (-k % 8)
+
+    def jumped(self, jumps: int = 1) -> "NumpyRNG":
+        return NumpyRNG(bit_generator=self.bit_generator.jumped(jumps))
+
+    def spawn(self, count: int) -> List["NumpyRNG"]:
+        return [self.jumped(index + 1) for index in range(count)]
+
+    def shuffled_shoes(self, cards: bytes, count: int) -> np.ndarray:
+        # `count` independent shuffles of the same cards in one call, one
+        # per row, e.g. to deal many shoes at once.
+        rows = np.tile(np.frombuffer(cards, dtype=np.uint8), (count, 1))
+        return self.generator.permuted(rows, axis=1, out=rows)
+
+
+def make_stream(backend: str, seed: int, stream: int):
+    # The RNG for one independent stream (e.g. one chunk of a run).
+    if backend == "python":
+        return random.Random(derive_seed(seed, stream))
+    if backend == "numpy":
+        return NumpyRNG(bit_generator=np.random.PCG64(seed).jumped(stream))
+    raise ValueError(f"Unknown RNG backend {backend!r}, expected one of {RNG_BACKENDS}")
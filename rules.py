@@ -0,0 +1,77 @@
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+import player
+
+@dataclass(frozen=True)
+class Rules:
+    # Table rules for BlackjackGame. The defaults are the engine's original
+    # rules: naturals are ordinary 21s paid 1:1, the dealer never peeks,
+    # pairs can be resplit without limit, split aces play like any other
+    # hand, doubling is allowed on any hand and there is no surrender.
+    #
+    # A game resolves its rules once, at construction, into the methods it
+    # plays with, so the default rules run the original code unchanged.
+
+    # None keeps the dealer_strategy the game was given; True/False pick
+    # player.dealer_strategy_h17 / player.dealer_strategy.
+    dealer_hits_soft_17: Optional[bool] = None
+    # Without it, DOUBLE_DOWN on a split hand is played as HIT.
+    double_after_split: bool = True
+    # Most hands a round can be split into; None means no limit. Once it is
+    # reached, SPLIT is played as the pair's unsplit total.
+    max_hands: Optional[int] = None
+    # Split aces get one card each and stand (and so are never resplit).
+    split_aces_one_card: bool = False
+    # Late surrender: Decision.SURRENDER on the first two cards of an unsplit
+    # hand gives up half the bet. Anywhere else it is played as HIT.
+    surrender: bool = False
+    # What a natural (a two-card 21 on the unsplit hand) pays, e.g. 1.5 for
+    # 3:2 or 1.2 for 6:5. A dealer natural then beats every other hand, and
+    # when the dealer doesn't peek it takes doubled and split bets too.
+    # None keeps naturals as ordinary 21s.
+    blackjack_payout: Optional[float] = None
+    # With a ten or ace showing, the dealer checks for a natural before the
+    # player acts and ends the round at once if there is one.
+    dealer_peeks: bool = False
+
+    # Whether every decision can be played exactly as the strategy gives it,
+    # and whether naturals are ordinary hands. Worked out once, since every
+    # game checks them.
+    plain_hands: bool = field(init=False, repr=False, compare=False)
+    plain_naturals: bool = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.max_hands is not None and self.max_hands < 1:
+            raise ValueError("max_hands must be at least 1")
+        if self.blackjack_payout is not None and self.blackjack_payout <= 0:
+            raise ValueError("blackjack_payout must be positive")
+        object.__setattr__(self, "plain_hands", (
+            self.double_after_split and self.max_hands is None
+            and not self.split_aces_one_card and not self.surrender
+        ))
+        object.__setattr__(self, "plain_naturals", self.blackjack_payout is None and not self.dealer_peeks)
+
+    def resolve_dealer_strategy(self, dealer_strategy: Callable) -> Callable:
+        if self.dealer_hits_soft_17 is None:
+            return dealer_strategy
+        return player.dealer_strategy_h17 if self.dealer_hits_soft_17 else player.dealer_strategy
+
+DEFAULT_RULES = Rules()
+
+# A few common casino rule sets.
+VEGAS_STRIP = Rules(
+    dealer_hits_soft_17=False, double_after_split=True, max_hands=4, split_aces_one_card=True,
+    surrender=True, blackjack_payout=1.5, dealer_peeks=True,
+)
+DOWNTOWN_H17 = Rules(
+    dealer_hits_soft_17=True, double_after_split=True, max_hands=4, split_aces_one_card=True,
+    surrender=False, blackjack_payout=1.5, dealer_peeks=True,
+)
+SIX_TO_FIVE_H17 = Rules(
+    dealer_hits_soft_17=True, double_after_split=True, max_hands=4, split_aces_one_card=True,
+    surrender=False, blackjack_payout=1.2, dealer_peeks=True,
+)
+EUROPEAN_NO_HOLE_CARD = Rules(
+    dealer_hits_soft_17=False, double_after_split=True, max_hands=2, split_aces_one_card=True,
+    surrender=False, blackjack_payout=1.5, dealer_peeks=False,
+)
@@ -0,0 +1,309 @@
+import argparse
+import inspect
+import os
+import pickle
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Callable, Iterator, Optional, Tuple
+from tqdm import tqdm
+
+from decision_stats import DecisionStats
+from game import BlackjackSession
+from history import HandHistoryWriter
+from profiling import GameProfiler, callback_name
+from rng import make_stream
+from stats import RunningStats
+
+DEFAULT_CHUNK_SIZE = 10_000
+DEFAULT_CHECKPOINT_INTERVAL = 60.0
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+@dataclass
+class SimulationResult:
+    rounds_played: int = 0
+    hands_played: int = 0
+    money_won: int = 0
+    money_bet: int = 0
+    stats: RunningStats = field(default_factory=RunningStats)
+    profile: Optional[GameProfiler] = None
+    decision_stats: Optional[DecisionStats] = None
+
+    def merge(self, other: "SimulationResult"):
+        self.rounds_played += other.rounds_played
+        self.hands_played += other.hands_played
+        self.money_won += other.money_won
+        self.money_bet += other.money_bet
+        self.stats.merge(other.stats)
+        if other.profile is not None:
+            if self.profile is None:
+                self.profile = GameProfiler()
+            self.profile.merge(other.profile)
+        if other.decision_stats is not None:
+            if self.decision_stats is None:
+                self.decision_stats = DecisionStats()
+            self.decision_stats.merge(other.decision_stats)
+
+    @property
+    def mean(self) -> float:
+        return self.stats.mean
+
+    @property
+    def variance(self) -> float:
+        return self.stats.variance
+
+    def edge(self, bet_amount: int) -> float:
+        return self.stats.mean / bet_amount
+
+    def edge_half_width(self, bet_amount: int) -> float:
+        # Half-width of the 95% confidence interval on the edge.
+        return self.stats.half_width() / bet_amount
+
+
+def config_fingerprint(config: dict) -> dict:
+    # Module-level functions and classes are compared by name, since that is
+    # how pickle stores them; anything else (a CompiledStrategy, a bet ramp)
+    # by its pickled value.
+    def fingerprint(value):
+        if isinstance(value, dict):
+            return {key: fingerprint(item) for key, item in value.items()}
+        if isinstance(value, type) or inspect.isroutine(value):
+            return callback_name(value)
+        return pickle.dumps(value)
+    return fingerprint(config)
+
+
+def save_checkpoint(path: str, config: dict, next_index: int, result: SimulationResult):
+    # Written to a temporary file and renamed over the old checkpoint, so a
+    # run killed mid-write still leaves the previous checkpoint intact.
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as f:
+        pickle.dump({"config": config, "next_index": next_index, "result": result}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary_path, path)
+
+
+def load_checkpoint(path: str) -> Tuple[dict, int, SimulationResult]:
+    with open(path, "rb") as f:
+        checkpoint = pickle.load(f)
+    return checkpoint["config"], checkpoint["next_index"], checkpoint["result"]
+
+
+def simulate_chunk(
+    num_rounds: int, num_decks: int, dealer_strategy: Callable,
+    player_strategy: Callable, bet_amount: int, rng, profile: bool = False,
+    session_class: type = BlackjackSession, session_options: Optional[dict] = None,
+    history_path: Optional[str] = None, record_decisions: bool = False
+) -> SimulationResult:
+    profiler = GameProfiler() if profile else None
+    decision_stats = DecisionStats() if record_decisions else None
+    history = HandHistoryWriter(history_path) if history_path is not None else None
+    session_options = dict(session_options or {})
+    if history is not None:
+        session_options["history"] = history
+    if decision_stats is not None:
+        session_options["decision_stats"] = decision_stats
+    session = session_class(
+        num_decks, dealer_strategy, player_strategy, rng=rng,
+        profiler=profiler, **session_options
+    )
+    money_won = 0
+    money_won_squared = 0
+    for _ in range(num_rounds):
+        won = session.play_round(bet_amount)
+        money_won += won
+        money_won_squared += won * won
+    if history is not None:
+        history.close()
+    return SimulationResult(
+        rounds_played=num_rounds,
+        hands_played=session.hands_played,
+        money_won=money_won,
+        money_bet=session.money_bet,
+        stats=RunningStats.from_sums(num_rounds, money_won, money_won_squared),
+        profile=profiler,
+        decision_stats=decision_stats,
+    )
+
+
+def run_chunks(
+    chunk_function: Callable, chunk_args: Callable[[int], tuple], num_chunks: int,
+    start_index: int = 0, num_workers: Optional[int] = None
+) -> Iterator:
+    # Yields chunk_function(*chunk_args(index)) for every chunk from
+    # start_index on, strictly in chunk order, so whatever the caller merges
+    # (and where it stops early) doesn't depend on which worker finishes
+    # first. num_workers=1 runs the chunks in this process.
+    #
+    # Otherwise the arguments are pickled to the workers, so strategies must
+    # be module-level functions rather than lambdas or closures. Arguments
+    # are only built as chunks are submitted, and at most
+    # CHUNKS_IN_FLIGHT_PER_WORKER chunks per worker are submitted or waiting
+    # to be yielded at a time. Closing the generator cancels the rest.
+    if num_workers == 1:
+        for index in range(start_index, num_chunks):
+            yield chunk_function(*chunk_args(index))
+        return
+
+    max_in_flight = CHUNKS_IN_FLIGHT_PER_WORKER * (num_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        try:
+            futures = {}
+            finished = {}
+            next_index = start_index
+            next_submit = start_index
+            pending = set()
+            while next_index < num_chunks:
+                while next_submit < num_chunks and next_submit - next_index < max_in_flight:
+                    future = executor.submit(chunk_function, *chunk_args(next_submit))
+                    futures[future] = next_submit
+                    pending.add(future)
+                    next_submit += 1
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished[futures.pop(future)] = future.result()
+                while next_index in finished:
+                    yield finished.pop(next_index)
+                    next_index += 1
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+
+def run_simulation(
+    num_rounds: int,
+    num_decks: int,
+    dealer_strategy: Callable,
+    player_strategy: Callable,
+    bet_amount: int,
+    seed: int = 0,
+    num_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: bool = True,
+    target_half_width: Optional[float] = None,
+    profile: bool = False,
+    session_class: type = BlackjackSession,
+    session_options: Optional[dict] = None,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+    history_dir: Optional[str] = None,
+    rng_backend: str = "python",
+    decision_stats: bool = False,
+) -> SimulationResult:
+    # With target_half_width set (as a fraction of the bet, e.g. 0.0005 for
+    # +/-0.05% edge), the run stops early once the 95% confidence interval on
+    # the edge is that narrow. With profile=True, every worker collects
+    # GameProfiler counters and the merged profile is returned on the result.
+    # session_class/session_options swap in another session type, e.g.
+    # counting.CountingSession with its tag table and bet ramp.
+    #
+    # With checkpoint_path set, the merged result is saved there at most every
+    # checkpoint_interval seconds (and when the run ends), and a run started
+    # with an existing checkpoint picks up from it. Every chunk is seeded from
+    # (seed, chunk index) with a fresh shoe, so the completed-chunk count is
+    # all the RNG and shoe state a resume needs, and the resumed result is
+    # bit-identical to an uninterrupted run.
+    #
+    # With history_dir set, every chunk streams its hands to
+    # history_dir/chunk_NNNNNN.bjh (see history.read_history). It is part of
+    # the checkpointed config, so a resumed run keeps writing there.
+    #
+    # rng_backend picks the shuffling RNG (see rng.RNG_BACKENDS); chunk i
+    # uses stream i of the seed.
+    #
+    # With decision_stats=True, every worker tallies a DecisionStats and the
+    # merged one is returned on the result.
+    config = dict(
+        num_rounds=num_rounds, num_decks=num_decks, dealer_strategy=dealer_strategy,
+        player_strategy=player_strategy, bet_amount=bet_amount, seed=seed,
+        chunk_size=chunk_size, target_half_width=target_half_width, profile=profile,
+        session_class=session_class, session_options=session_options, rng_backend=rng_backend,
+        decision_stats=decision_stats, history_dir=history_dir,
+    )
+    if history_dir is not None:
+        os.makedirs(history_dir, exist_ok=True)
+    num_chunks = -(-num_rounds // chunk_size)
+
+    def chunk_args(index: int) -> tuple:
+        # Built as chunks are handed out, so a long run never holds every
+        # chunk's RNG stream at once.
+        return (
+            min(chunk_size, num_rounds - index * chunk_size), num_decks, dealer_strategy,
+            player_strategy, bet_amount, make_stream(rng_backend, seed, index), profile,
+            session_class, session_options,
+            os.path.join(history_dir, f"chunk_{index:06d}.bjh") if history_dir is not None else None,
+            decision_stats,
+        )
+
+    start_index = 0
+    result = SimulationResult()
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        saved_config, start_index, result = load_checkpoint(checkpoint_path)
+        if config_fingerprint(saved_config) != config_fingerprint(config):
+            raise ValueError(f"Checkpoint {checkpoint_path} was written by a run with a different configuration")
+    last_checkpoint = perf_counter()
+
+    def checkpoint(next_index: int, force: bool = False):
+        nonlocal last_checkpoint
+        if checkpoint_path is None:
+            return
+        if force or perf_counter() - last_checkpoint >= checkpoint_interval:
+            save_checkpoint(checkpoint_path, config, next_index, result)
+            last_checkpoint = perf_counter()
+
+    progress_bar = tqdm(total=num_rounds, initial=result.rounds_played, disable=not progress)
+
+    def converged() -> bool:
+        if progress:
+            progress_bar.set_postfix(
+                edge=f"{result.edge(bet_amount):+.3%}",
+                ci=f"±{result.edge_half_width(bet_amount):.3%}",
+            )
+        return (
+            target_half_width is not None
+            and result.rounds_played > 1
+            and result.edge_half_width(bet_amount) <= target_half_width
+        )
+
+    with progress_bar:
+        if start_index and converged():
+            return result
+
+        with closing(run_chunks(simulate_chunk, chunk_args, num_chunks, start_index, num_workers)) as chunk_results:
+            for index, chunk_result in enumerate(chunk_results, start_index):
+                result.merge(chunk_result)
+                progress_bar.update(chunk_result.rounds_played)
+                if converged():
+                    checkpoint(index + 1, force=True)
+                    return result
+                checkpoint(index + 1)
+
+    checkpoint(num_chunks, force=True)
+    return result
+
+
+def resume_simulation(
+    checkpoint_path: str, num_workers: Optional[int] = None, progress: bool = True,
+    checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL
+) -> SimulationResult:
+    config, _, _ = load_checkpoint(checkpoint_path)
+    return run_simulation(
+        **config, num_workers=num_workers, progress=progress,
+        checkpoint_path=checkpoint_path, checkpoint_interval=checkpoint_interval,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resume a checkpointed simulation run.")
+    parser.add_argument("checkpoint", help="checkpoint file written by run_simulation(checkpoint_path=...)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--interval", type=float, default=DEFAULT_CHECKPOINT_INTERVAL,
+                        help="seconds between checkpoints")
+    args = parser.parse_args()
+
+    config = load_checkpoint(args.checkpoint)[0]
+    result = resume_simulation(args.checkpoint, args.workers, checkpoint_interval=args.interval)
+    bet_amount = config["bet_amount"]
+    print(f"{result.rounds_played} rounds, {result.hands_played} hands, money won: {result.money_won}")
+    print(f"Edge: {result.edge(bet_amount):+.3%} ± {result.edge_half_width(bet_amount):.3%}")
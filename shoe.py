@@ -0,0 +1,205 @@
+import copy
+import random
+from functools import lru_cache
+from typing import Tuple
+from utils import *
+
+CARDS_PER_DECK = 52
+
+# Shoe compositions are tuples of remaining card counts indexed by compact
+# rank - 1 (see utils.rank_map), so the last entry counts all ten-valued cards.
+Counts = Tuple[int, ...]
+
+def shoe_counts(num_decks: int) -> Counts:
+    per_rank = CARDS_PER_DECK // 13 * num_decks
+    return (per_rank,) * 9 + (4 * per_rank,)
+
+def remove_card(counts: Counts, rank: int) -> Counts:
+    assert counts[rank - 1] > 0, "There must be a card of this rank left to remove it!"
+    return counts[:rank - 1] + (counts[rank - 1] - 1,) + counts[rank:]
+
+@lru_cache(maxsize=None)
+def shoe_card_ids(num_decks: int) -> bytes:
+    # Every card id in an unshuffled shoe, built once per deck count.
+    return bytes(card_id for card_id in range(len(CARDS)) for _ in range(num_decks))
+
+DEFAULT_PENETRATION = 0.8
+
+class Shoe:
+    def __init__(self, num_decks: int, rng=None, penetration: float = DEFAULT_PENETRATION):
+        self.num_decks = num_decks
+        # Anything with a random.shuffle-compatible shuffle() works here; the
+        # default keeps using the global random state.
+        self.rng = rng if rng is not None else random
+        # The shoe is reshuffled once `penetration` of it has been dealt. The
+        # rounding keeps float error (1 - 0.8 < 0.2) from moving the cutoff.
+        # Any penetration is safe, even on one deck: a round that runs the
+        # shoe dry finishes on the reshuffled discards.
+        assert 0 < penetration < 1, "Penetration must be a fraction of the shoe!"
+        self.penetration = penetration
+        self.RESET_CUTOFF = int(round(CARDS_PER_DECK * num_decks * (1 - penetration), 6))
+
+        # The shoe holds compact card ids (see utils.CARDS), one byte per card.
+        self.cards = shoe_card_ids(num_decks)
+        self.shuffle()
+
+    def shuffle(self):
+        self.deck = bytearray(self.cards)
+        self.rng.shuffle(self.deck)
+        # The deck as shuffled; cards are popped off its end, so the cards
+        # dealt since the round started are shuffled[len(deck):round_start].
+        self.shuffled = bytes(self.deck)
+        self.start_round()
+
+    def start_round(self):
+        # Marks the cards dealt from here on as being on the table, so a shoe
+        # that runs dry mid-round knows which cards it can't reshuffle.
+        self.in_play = b""
+        self.round_start = self.cards_remaining()
+
+    def needs_shuffle(self) -> bool:
+        return len(self.deck) <= self.RESET_CUTOFF
+
+    def shuffle_if_needed(self) -> bool:
+        # Called before every round, so this is also where rounds start.
+        if self.needs_shuffle():
+            self.shuffle()
+            return True
+        self.start_round()
+        return False
+
+    def discards(self) -> bytearray:
+        # Every card of the shoe that isn't on the table, in card id order,
+        # for reshuffling mid-round once the shoe has run dry.
+        in_play = self.in_play
+        counts = [self.num_decks] * len(CARDS)
+        for card_id in in_play:
+            counts[card_id] -= 1
+        assert any(counts), "A round used every card in the shoe!"
+        return bytearray(card_id for card_id, count in enumerate(counts) for _ in range(count))
+
+    def reshuffle_discards(self):
+        # The deck is empty, so every card dealt since the round started is
+        # on the table; the rest are shuffled back in and the round goes on.
+        self.in_play += self.shuffled[:self.round_start]
+        self.deck = self.discards()
+        self.rng.shuffle(self.deck)
+        self.shuffled = bytes(self.deck)
+        self.round_start = len(self.deck)
+
+    def copy(self) -> "Shoe":
+        # The same cards in the same order, dealt independently of this shoe.
+        # The copy shares this shoe's rng, so only reshuffle the original.
+        shoe = copy.copy(self)
+        shoe.deck = bytearray(self.deck)
+        return shoe
+
+    def cards_remaining(self) -> int:
+        return len(self.deck)
+
+    def counts(self) -> Counts:
+        counts = [0] * 10
+        for card_id in self.deck:
+            counts[CARD_RANKS[card_id] - 1] += 1
+        return tuple(counts)
+
+    def draw_card(self) -> Card:
+        if not self.deck:
+            self.reshuffle_discards()
+        return CARDS[self.deck.pop()]
+
+    def draw_rank(self) -> int:
+        if not self.deck:
+            self.reshuffle_discards()
+        return CARD_RANKS[self.deck.pop()]
+
+
+class LazyShoe(Shoe):
+    # A Shoe that never shuffles up front. The card ids sit in one
+    # preallocated array, undealt cards first, and each draw runs one step
+    # of Fisher-Yates: pick a random undealt card and swap it behind the
+    # undealt ones. Every draw is uniform over the undealt cards, just like
+    # dealing from a fully shuffled shoe, and a reshuffle only has to mark
+    # every card undealt again, whatever order the array was left in.
+    #
+    # Draws use rng.random(); its 53-bit resolution biases the pick by less
+    # than one part in 10**13 for any shoe size.
+    ids = None
+
+    def shuffle(self):
+        if self.ids is None:
+            self.ids = bytearray(self.cards)
+        self.remaining = len(self.ids)
+        self.start_round()
+
+    @property
+    def deck(self) -> memoryview:
+        # The undealt cards, in no particular order.
+        return memoryview(self.ids)[:self.remaining]
+
+    def needs_shuffle(self) -> bool:
+        return self.remaining <= self.RESET_CUTOFF
+
+    def cards_remaining(self) -> int:
+        return self.remaining
+
+    def copy(self) -> "LazyShoe":
+        shoe = copy.copy(self)
+        shoe.ids = bytearray(self.ids)
+        return shoe
+
+    def counts(self) -> Counts:
+        counts = [0] * 10
+        for card_id in self.ids[:self.remaining]:
+            counts[CARD_RANKS[card_id] - 1] += 1
+        return tuple(counts)
+
+    def reshuffle_discards(self):
+        # Dealt cards sit behind the undealt ones, so with none left the
+        # cards dealt since the round started are ids[:round_start]. The
+        # discards go back in front of the cards on the table.
+        self.in_play += bytes(self.ids[:self.round_start])
+        discards = self.discards()
+        self.ids = discards + self.in_play
+        self.remaining = len(discards)
+        self.round_start = self.remaining
+
+    def draw_id(self) -> int:
+        if not self.remaining:
+            self.reshuffle_discards()
+        remaining = self.remaining
+        ids = self.ids
+        index = int(self.rng.random() * remaining)
+        remaining -= 1
+        card_id = ids[index]
+        ids[index] = ids[remaining]
+        ids[remaining] = card_id
+        self.remaining = remaining
+        return card_id
+
+    def draw_card(self) -> Card:
+        return CARDS[self.draw_id()]
+
+    def draw_rank(self) -> int:
+        return CARD_RANKS[self.draw_id()]
+
+
+if __name__ == "__main__":
+    from game import BlackjackSession
+    from player import dealer_strategy, player_strategy
+
+    # A single deck dealt to 80% runs dry mid-round now and then (first at
+    # round 12,850 with this seed); the round has to finish on the discards.
+    # Deeper penetrations, as a sweep may ask for, run dry far more often.
+    for penetration in (DEFAULT_PENETRATION, 0.9, 0.95):
+        for shoe_class in (Shoe, LazyShoe):
+            session = BlackjackSession(
+                1, dealer_strategy, player_strategy, rng=random.Random(0),
+                penetration=penetration, shoe_class=shoe_class
+            )
+            for _ in range(50_000):
+                session.play_round(10)
+            print(
+                f"{shoe_class.__name__} at {penetration:.0%}: played {session.rounds_played} "
+                "single-deck rounds (should be 50000)"
+            )
@@ -0,0 +1,55 @@
+import math
+from dataclasses import dataclass
+from typing import Tuple
+
+Z_95 = 1.959963984540054
+
+@dataclass
+class RunningStats:
+    # Streaming mean and variance (Welford), mergeable across workers with
+    # Chan et al.'s pairwise update.
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other: "RunningStats"):
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    @classmethod
+    def from_sums(cls, count: int, total: float, total_squared: float) -> "RunningStats":
+        # For hot loops that only keep plain running sums; with integer
+        # winnings these sums are exact, so nothing is lost converting here.
+        if not count:
+            return cls()
+        return cls(count=count, mean=total / count, m2=total_squared - total * total / count)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def stderr(self) -> float:
+        return math.sqrt(self.variance / self.count) if self.count else math.inf
+
+    def half_width(self, z: float = Z_95) -> float:
+        return z * self.stderr
+
+    def confidence_interval(self, z: float = Z_95) -> Tuple[float, float]:
+        half_width = self.half_width(z)
+        return self.mean - half_width, self.mean + half_width
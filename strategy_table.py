@@ -0,0 +1,139 @@
+from utils import *
+
+# Every hand a strategy can be asked about maps to one state index:
+# hard totals 4-21, then soft totals 12-21, then pairs by compact rank.
+# Dealer upcards are columns indexed by compact rank - 1, so J/Q/K share
+# the TEN column.
+HARD_TOTALS = range(4, 22)
+SOFT_TOTALS = range(12, 22)
+PAIR_RANKS = range(1, 11)
+UPCARD_RANKS = range(1, 11)
+
+SOFT_OFFSET = len(HARD_TOTALS)
+PAIR_OFFSET = SOFT_OFFSET + len(SOFT_TOTALS)
+NUM_STATES = PAIR_OFFSET + len(PAIR_RANKS)
+NUM_UPCARDS = len(UPCARD_RANKS)
+# The state of hands no table row covers: fewer than two cards, or bust.
+# It is past the last row, so looking it up raises instead of reading
+# another row's decision.
+NO_STATE = NUM_STATES
+
+def _strategy_state(hand_state: int) -> int:
+    pair_rank = HAND_PAIR_RANKS[hand_state]
+    hard_total = HAND_HARD_TOTALS[hand_state]
+    if HAND_STATES[hand_state][2] < 2 or hard_total > 21:
+        return NO_STATE
+    if pair_rank:
+        return PAIR_OFFSET + pair_rank - 1
+    if HAND_IS_SOFT[hand_state]:
+        return SOFT_OFFSET + hard_total - 2
+    return hard_total - 4
+
+# The strategy state of every utils hand state.
+STRATEGY_STATES = [_strategy_state(state) for state in range(NUM_HAND_STATES)]
+assert set(STRATEGY_STATES) == set(range(NUM_STATES)) | {NO_STATE}, "Every table row must be reachable!"
+
+def state_index(hand: Hand) -> int:
+    return STRATEGY_STATES[hand.state]
+
+
+class CompiledStrategy:
+    # A strategy table flattened to one Decision per (state, upcard) cell.
+    def __init__(self, decisions: List[Decision]):
+        assert len(decisions) == NUM_STATES * NUM_UPCARDS, "There must be a decision for every cell!"
+        self.decisions = decisions
+
+    def decision(self, state: int, upcard_rank: int) -> Decision:
+        if not 0 <= state < NUM_STATES:
+            raise ValueError(f"State {state} isn't a strategy table row")
+        return self.decisions[state * NUM_UPCARDS + upcard_rank - 1]
+
+    def __call__(self, player_cards: List[Card], dealer_showing: Card) -> Decision:
+        if not isinstance(player_cards, Hand):
+            player_cards = Hand(player_cards)
+        try:
+            return self.decisions[STRATEGY_STATES[player_cards.state] * NUM_UPCARDS + dealer_showing.rank - 1]
+        except IndexError:
+            raise ValueError(f"{player_cards} has no strategy table row") from None
+
+    def decide_batch(self, batch) -> List[Decision]:
+        # Batched protocol (see lockstep.DecisionBatch): one table read per
+        # hand, straight from the precomputed states and upcard ranks.
+        decisions = self.decisions
+        return [
+            decisions[state * NUM_UPCARDS + upcard - 1]
+            for state, upcard in zip(batch.states, batch.upcards)
+        ]
+
+
+def _compile_row(row, name: str, errors: List[str]) -> dict:
+    # Collapses a row keyed by Value into one keyed by upcard rank, checking
+    # that JACK/QUEEN/KING agree with TEN wherever they are given.
+    by_rank = {}
+    for dealer_value, decision in row.items():
+        rank = rank_map[dealer_value]
+        if rank in by_rank and by_rank[rank] != decision:
+            errors.append(f"{name} vs {dealer_value.name} disagrees with the other ten-valued upcards")
+        by_rank[rank] = decision
+    return by_rank
+
+
+def compile_strategy(hard_totals: dict, soft_totals: dict, pair_splitting: dict) -> CompiledStrategy:
+    errors = []
+    decisions = [None] * (NUM_STATES * NUM_UPCARDS)
+
+    hard_rows = {}
+    for total in HARD_TOTALS:
+        if total not in hard_totals:
+            errors.append(f"hard {total} is missing")
+            continue
+        hard_rows[total] = _compile_row(hard_totals[total], f"hard {total}", errors)
+
+    soft_rows = {}
+    for total in SOFT_TOTALS:
+        if total not in soft_totals:
+            errors.append(f"soft {total} is missing")
+            continue
+        soft_rows[total] = _compile_row(soft_totals[total], f"soft {total}", errors)
+
+    for kind, totals, offset, rows in (
+        ("hard", HARD_TOTALS, 0, hard_rows), ("soft", SOFT_TOTALS, SOFT_OFFSET, soft_rows)
+    ):
+        for total, row in rows.items():
+            index = offset + total - totals.start
+            for upcard in UPCARD_RANKS:
+                decision = row.get(upcard)
+                if not isinstance(decision, Decision) or decision == Decision.SPLIT:
+                    errors.append(f"{kind} {total} vs rank {upcard} needs a HIT/STAND/DOUBLE_DOWN/SURRENDER decision")
+                    continue
+                decisions[index * NUM_UPCARDS + upcard - 1] = decision
+
+    pair_rows = {}
+    for pair_value, row in pair_splitting.items():
+        rank = rank_map[pair_value]
+        compiled = _compile_row(row, f"pair {pair_value.name}", errors)
+        if rank in pair_rows and pair_rows[rank] != compiled:
+            errors.append(f"pair {pair_value.name} disagrees with the other ten-valued pairs")
+        pair_rows[rank] = compiled
+
+    for rank in PAIR_RANKS:
+        if rank not in pair_rows:
+            errors.append(f"pair of rank {rank} is missing")
+            continue
+        # A pair that isn't split is played as its ordinary hard or soft total.
+        unsplit = SOFT_OFFSET if rank == 1 else 2 * rank - HARD_TOTALS.start
+        for upcard in UPCARD_RANKS:
+            should_split = pair_rows[rank].get(upcard)
+            if should_split not in ("Y", "N"):
+                errors.append(f"pair of rank {rank} vs rank {upcard} needs a Y/N entry")
+                continue
+            if should_split == "Y":
+                decision = Decision.SPLIT
+            else:
+                decision = decisions[unsplit * NUM_UPCARDS + upcard - 1]
+            decisions[(PAIR_OFFSET + rank - 1) * NUM_UPCARDS + upcard - 1] = decision
+
+    if errors:
+        raise ValueError("Invalid strategy table: " + "; ".join(errors))
+
+    return CompiledStrategy(decisions)
@@ -0,0 +1,177 @@
+import argparse
+import glob
+import hashlib
+import itertools
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from tqdm import tqdm
+
+import rules as rule_sets
+from player import dealer_strategy, player_strategy, player_copy_dealer
+from rng import RNG_BACKENDS
+from rules import Rules, DEFAULT_RULES
+from runner import DEFAULT_CHUNK_SIZE, SimulationResult, config_fingerprint, run_simulation
+from shoe import DEFAULT_PENETRATION
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sweep_cache")
+
+STRATEGIES = {
+    "basic": player_strategy,
+    "copy_dealer": player_copy_dealer,
+}
+RULE_SETS = {
+    "default": DEFAULT_RULES,
+    "vegas_strip": rule_sets.VEGAS_STRIP,
+    "downtown_h17": rule_sets.DOWNTOWN_H17,
+    "six_to_five_h17": rule_sets.SIX_TO_FIVE_H17,
+    "european_no_hole_card": rule_sets.EUROPEAN_NO_HOLE_CARD,
+}
+
+@dataclass(frozen=True)
+class SweepCell:
+    num_decks: int
+    player_strategy: Callable
+    rules: Rules = DEFAULT_RULES
+    penetration: float = DEFAULT_PENETRATION
+    bet_amount: int = 10
+    num_rounds: int = 100_000
+    seed: int = 0
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    dealer_strategy: Callable = dealer_strategy
+    rng_backend: str = "python"
+    # Only for display; cells are cached by what they simulate, not their labels.
+    labels: Tuple[str, ...] = field(default=(), compare=False)
+
+    def config(self) -> dict:
+        return dict(
+            num_decks=self.num_decks, player_strategy=self.player_strategy, rules=self.rules,
+            penetration=self.penetration, bet_amount=self.bet_amount, num_rounds=self.num_rounds,
+            seed=self.seed, chunk_size=self.chunk_size, dealer_strategy=self.dealer_strategy,
+            rng_backend=self.rng_backend,
+        )
+
+
+def code_version(directory: str = os.path.dirname(os.path.abspath(__file__))) -> str:
+    # Any edit to the simulator's source invalidates every cached cell.
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(directory, "*.py"))):
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def cell_key(cell: SweepCell, version: str) -> str:
+    fingerprint = config_fingerprint(cell.config())
+    return hashlib.sha256(repr((sorted(fingerprint.items()), version)).encode()).hexdigest()
+
+
+def run_cell(cell: SweepCell) -> SimulationResult:
+    return run_simulation(
+        cell.num_rounds, cell.num_decks, cell.dealer_strategy, cell.player_strategy,
+        cell.bet_amount, seed=cell.seed, num_workers=1, chunk_size=cell.chunk_size,
+        progress=False, session_options={"rules": cell.rules, "penetration": cell.penetration},
+        rng_backend=cell.rng_backend,
+    )
+
+
+def load_cached(cache_dir: str, key: str) -> Optional[SimulationResult]:
+    path = os.path.join(cache_dir, f"{key}.pkl")
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def store_cached(cache_dir: str, key: str, result: SimulationResult):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{key}.pkl")
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as f:
+        pickle.dump(result, f)
+    os.replace(temporary_path, path)
+
+
+def grid(
+    deck_counts: Iterable[int],
+    strategies: Dict[str, Callable],
+    rules: Dict[str, Rules],
+    penetrations: Iterable[float] = (DEFAULT_PENETRATION,),
+    bets: Iterable[int] = (10,),
+    **cell_options
+) -> List[SweepCell]:
+    cells = []
+    for num_decks, strategy_name, rules_name, penetration, bet_amount in itertools.product(
+        deck_counts, strategies, rules, penetrations, bets
+    ):
+        cells.append(SweepCell(
+            num_decks=num_decks, player_strategy=strategies[strategy_name], rules=rules[rules_name],
+            penetration=penetration, bet_amount=bet_amount,
+            labels=(f"{num_decks} decks", strategy_name, rules_name, f"pen {penetration:g}", f"bet {bet_amount}"),
+            **cell_options
+        ))
+    return cells
+
+
+def run_sweep(
+    cells: List[SweepCell], num_workers: Optional[int] = None,
+    cache_dir: str = DEFAULT_CACHE_DIR, progress: bool = True
+) -> List[SimulationResult]:
+    # Results come back in the same order as `cells`. Each cell is one
+    # single-process run_simulation, so a cached result is exactly what
+    # running the cell again would give; cells are spread across the pool.
+    version = code_version()
+    keys = [cell_key(cell, version) for cell in cells]
+    results: List[Optional[SimulationResult]] = [load_cached(cache_dir, key) for key in keys]
+    missing = [index for index, result in enumerate(results) if result is None]
+
+    with tqdm(total=len(missing), disable=not progress) as progress_bar:
+        if num_workers == 1:
+            for index in missing:
+                results[index] = run_cell(cells[index])
+                store_cached(cache_dir, keys[index], results[index])
+                progress_bar.update()
+        elif missing:
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                futures = {executor.submit(run_cell, cells[index]): index for index in missing}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    results[index] = future.result()
+                    store_cached(cache_dir, keys[index], results[index])
+                    progress_bar.update()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a grid of simulations, reusing cached cells.")
+    parser.add_argument("--decks", type=int, nargs="+", default=[1, 2, 6, 8])
+    parser.add_argument("--strategies", nargs="+", choices=sorted(STRATEGIES), default=["basic"])
+    parser.add_argument("--rules", nargs="+", choices=sorted(RULE_SETS), default=["default"])
+    parser.add_argument("--penetration", type=float, nargs="+", default=[DEFAULT_PENETRATION])
+    parser.add_argument("--bet", type=int, nargs="+", default=[10])
+    parser.add_argument("--rounds", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rng", choices=RNG_BACKENDS, default="python")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args()
+
+    cells = grid(
+        args.decks,
+        {name: STRATEGIES[name] for name in args.strategies},
+        {name: RULE_SETS[name] for name in args.rules},
+        args.penetration,
+        args.bet,
+        num_rounds=args.rounds,
+        seed=args.seed,
+        rng_backend=args.rng,
+    )
+    results = run_sweep(cells, args.workers, args.cache_dir)
+    for cell, result in zip(cells, results):
+        print(
+            f"{' | '.join(cell.labels):70} edge {result.edge(cell.bet_amount):+.3%} "
+            f"± {result.edge_half_width(cell.bet_amount):.3%}"
+        )
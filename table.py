@@ -0,0 +1,143 @@
+import argparse
+import random
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+from utils import *
+from shoe import *
+from game import BlackjackGame
+from player import dealer_strategy, player_strategy
+from rules import Rules, DEFAULT_RULES
+
+MAX_SEATS = 7
+# Cards set aside per hand on the table (every seat's and the dealer's) when
+# deciding whether the shoe can deal another round. Hands rarely take more;
+# a round that does runs into the reshuffled discards.
+CARDS_PER_HAND = 5
+
+@dataclass
+class Seat:
+    player_strategy: Callable
+    bet_amount: int = 10
+
+
+class BlackjackTable:
+    # Up to seven seats playing from one shoe. Each round is dealt in casino
+    # order (a card to every seat, the upcard, a second card to every seat,
+    # the hole card), seats play in order, the dealer's hand is played once
+    # and every seat is settled against it.
+    #
+    # Each seat plays its hands through its own BlackjackGame, built once with
+    # deal=False, so seats get the same rules resolution as single games.
+    #
+    # The shoe's penetration cutoff is sized for one seat, so it is raised to
+    # leave room for a whole round at this table.
+    def __init__(
+        self, num_decks: int, dealer_strategy: Callable, seats: List[Seat],
+        rng=None, rules: Rules = DEFAULT_RULES, penetration: float = DEFAULT_PENETRATION,
+        shoe_class: type = Shoe
+    ):
+        if not 1 <= len(seats) <= MAX_SEATS:
+            raise ValueError(f"A table seats 1 to {MAX_SEATS} players, not {len(seats)}")
+        self.seats = seats
+        self.rules = rules
+        self.shoe = shoe_class(num_decks, rng=rng, penetration=penetration)
+        round_cards = CARDS_PER_HAND * (len(seats) + 1)
+        if round_cards >= len(self.shoe.cards):
+            raise ValueError(
+                f"A {num_decks}-deck shoe can't deal a round of {len(seats)} seats "
+                f"({round_cards} cards)"
+            )
+        self.shoe.RESET_CUTOFF = max(self.shoe.RESET_CUTOFF, round_cards)
+        self.seat_games = [
+            BlackjackGame(num_decks, dealer_strategy, seat.player_strategy, shoe=self.shoe, rules=rules, deal=False)
+            for seat in seats
+        ]
+        self.rounds_played = 0
+        self.hands_played = [0] * len(seats)
+        self.money_bet = [0] * len(seats)
+        self.cards_dealt = 0
+
+    def play_round(self) -> List[int]:
+        # Returns the money each seat won this round.
+        shoe = self.shoe
+        shoe.shuffle_if_needed()
+        rules = self.rules
+        payout = rules.blackjack_payout
+        num_seats = len(self.seats)
+
+        first_cards = [shoe.draw_card() for _ in range(num_seats)]
+        dealer_showing = shoe.draw_card()
+        player_hands = [Hand([first_card, shoe.draw_card()]) for first_card in first_cards]
+        dealer_cards = Hand([dealer_showing, shoe.draw_card()])
+        dealer_natural = dealer_cards.value == 21
+
+        money_won = [0] * num_seats
+        seat_outcomes: List[Optional[List[HandOutcome]]] = [None] * num_seats
+        for seat, (game, player_cards) in enumerate(zip(self.seat_games, player_hands)):
+            bet_amount = self.seats[seat].bet_amount
+            self.money_bet[seat] += bet_amount
+            self.hands_played[seat] += 1
+            player_natural = player_cards.value == 21
+            if dealer_natural and rules.dealer_peeks:
+                money_won[seat] = 0 if player_natural else -bet_amount
+                continue
+            if player_natural and payout is not None:
+                money_won[seat] = 0 if dealer_natural else bet_amount * payout
+                continue
+
+            game.dealer_showing = dealer_showing
+            game.num_hands = 1
+            outcomes = game.play_player_hand(player_cards, dealer_showing, bet_amount)
+            seat_outcomes[seat] = outcomes
+            self.hands_played[seat] += len(outcomes) - 1
+            for outcome in outcomes:
+                money_won[seat] -= outcome.money_bet / 2 if outcome.surrendered else outcome.money_bet
+
+        # The dealer plays once, and only if some seat still has a hand that
+        # the dealer's total decides. An unpeeked dealer natural takes every
+        # bet still on the table.
+        live = any(
+            outcome.value <= 21 and not outcome.surrendered
+            for outcomes in seat_outcomes if outcomes is not None
+            for outcome in outcomes
+        )
+        if live and not (dealer_natural and payout is not None):
+            dealer_value = self.seat_games[0].play_dealer_hand(dealer_cards)
+            for seat, outcomes in enumerate(seat_outcomes):
+                if outcomes is None:
+                    continue
+                for outcome in outcomes:
+                    if outcome.value > 21 or outcome.surrendered:
+                        continue
+                    if dealer_value > 21 or outcome.value > dealer_value:
+                        money_won[seat] += outcome.money_bet * 2
+                    elif outcome.value == dealer_value:
+                        money_won[seat] += outcome.money_bet
+
+        self.rounds_played += 1
+        # Counted from where the round started, since it may have run into
+        # the reshuffled discards.
+        self.cards_dealt += len(shoe.in_play) + shoe.round_start - shoe.cards_remaining()
+        return money_won
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play a table of basic-strategy seats from one shoe.")
+    parser.add_argument("--seats", type=int, default=MAX_SEATS)
+    parser.add_argument("--rounds", type=int, default=100_000)
+    parser.add_argument("--decks", type=int, default=6)
+    parser.add_argument("--bet", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    table = BlackjackTable(
+        args.decks, dealer_strategy, [Seat(player_strategy, args.bet) for _ in range(args.seats)],
+        rng=random.Random(args.seed),
+    )
+    totals = [0] * args.seats
+    for _ in range(args.rounds):
+        for seat, won in enumerate(table.play_round()):
+            totals[seat] += won
+    for seat, total in enumerate(totals):
+        print(f"Seat {seat + 1}: edge {total / table.money_bet[seat]:+.3%} over {table.hands_played[seat]} hands")
+    print(f"{table.cards_dealt / table.rounds_played:.2f} cards dealt per round")
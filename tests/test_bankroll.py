@@ -0,0 +1,39 @@
+from bankroll import *
+from runner import run_simulation
+
+def test_measured_outcomes_match_run_simulation():
+    # Same chunks and streams, so the same rounds are played.
+    measured = [
+        measure_outcomes(
+            12000, 6, dealer_strategy, player_strategy, 10, seed=1, num_workers=workers,
+            chunk_size=2500, progress=False,
+        )
+        for workers in (1, 2)
+    ]
+    result = run_simulation(
+        12000, 6, dealer_strategy, player_strategy, 10, seed=1, num_workers=1, chunk_size=2500, progress=False,
+    )
+    assert np.array_equal(measured[0].outcomes, measured[1].outcomes)
+    assert np.array_equal(measured[0].probabilities, measured[1].probabilities)
+    assert abs(measured[0].mean * 12000 - result.money_won) < 1e-6
+
+def test_bankroll_paths_do_not_depend_on_workers():
+    distribution = OutcomeDistribution.from_counts({-10: 50, 0: 8, 10: 42})
+    results = [
+        simulate_bankrolls(distribution, 200, 3 * SESSION_BLOCK // 2, 600, seed=4, num_workers=workers, progress=False)
+        for workers in (1, 2)
+    ]
+    assert results[0].num_sessions == 3 * SESSION_BLOCK // 2
+    for name in ("ruin_round", "double_round", "max_drawdown", "final_bankroll"):
+        assert np.array_equal(getattr(results[0], name), getattr(results[1], name))
+
+def test_sessions_stop_at_ruin_without_going_negative():
+    # Rounds can lose up to four bets, more than a small bankroll has left.
+    distribution = OutcomeDistribution.from_counts({-40: 2, -20: 5, -10: 45, -5: 3, 0: 8, 10: 40, 15: 4, 20: 3})
+    result = simulate_bankrolls(distribution, 100, 4000, 2000, seed=3, min_bet=10, num_workers=1, progress=False)
+    ruined = result.ruin_round >= 0
+    assert result.risk_of_ruin > 0.5
+    assert (result.final_bankroll >= 0).all()
+    # Ruined sessions couldn't cover another bet; the rest still can.
+    assert (result.final_bankroll[ruined] < 10).all()
+    assert (result.final_bankroll[~ruined] >= 10).all()
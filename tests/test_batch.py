@@ -0,0 +1,23 @@
+import random
+import pytest
+from batch import BatchSimulator
+from game import *
+
+# expected_value(basic_strategy, 6); see test_ev.
+BASIC_STRATEGY_EV = -0.024647
+
+def test_batch_edge_matches_exact_ev():
+    # About four standard errors of a 2M round run.
+    result = BatchSimulator(6, seed=3).run(2_000_000, 1, batch_size=500_000)
+    assert result.rounds_played == 2_000_000
+    assert result.money_won / result.rounds_played == pytest.approx(BASIC_STRATEGY_EV, abs=0.0025)
+
+def test_batch_splits_like_the_game():
+    batch = BatchSimulator(6, seed=4).run(500_000, 10)
+    session = BlackjackSession(6, dealer_strategy, basic_strategy, rng=random.Random(4))
+    for _ in range(100_000):
+        session.play_round(10)
+    assert batch.hands_played / batch.rounds_played == pytest.approx(
+        session.hands_played / session.rounds_played, abs=0.005
+    )
+    assert batch.money_bet == 10 * batch.rounds_played
@@ -0,0 +1,12 @@
+from benchmark import find_regressions, hands_per_second
+
+def test_regressions_respect_metric_direction():
+    baseline = {"hands_per_sec_6_decks": 100_000, "draw_card_us": 1.0, "reset_6_decks_us": 10.0}
+    results = {"hands_per_sec_6_decks": 80_000, "draw_card_us": 0.5, "reset_6_decks_us": 12.0, "new_us": 1.0}
+    regressed = {name: change for name, _, _, change in find_regressions(results, baseline, 0.10)}
+    assert regressed.keys() == {"hands_per_sec_6_decks", "reset_6_decks_us"}
+    assert regressed["hands_per_sec_6_decks"] == 0.2
+    assert not find_regressions(results, baseline, 0.25)
+
+def test_hands_per_second_runs_every_round():
+    assert hands_per_second(1, 2000, 1, 0) > 0
@@ -0,0 +1,36 @@
+from compare import *
+from runner import CHUNKS_IN_FLIGHT_PER_WORKER, run_chunks
+
+def test_same_strategy_has_no_difference():
+    # Both copies see the same cards, so every paired difference is zero.
+    result = compare_strategies(
+        5000, 6, dealer_strategy, {"basic": player_strategy, "again": player_strategy}, 10,
+        seed=1, num_workers=1, chunk_size=1000, progress=False,
+    )
+    assert result.winnings["basic"].count == 5000
+    assert result.winnings["basic"].mean == result.winnings["again"].mean
+    assert result.differences["again"].mean == 0 and result.differences["again"].variance == 0
+
+def test_result_does_not_depend_on_workers():
+    results = [
+        compare_strategies(
+            12000, 6, dealer_strategy, STRATEGIES, 10, seed=2, num_workers=workers,
+            chunk_size=1500, progress=False,
+        )
+        for workers in (1, 3)
+    ]
+    for name in STRATEGIES:
+        assert results[0].winnings[name].mean == results[1].winnings[name].mean
+        assert results[0].winnings[name].variance == results[1].winnings[name].variance
+    assert results[0].differences["copy_dealer"].mean == results[1].differences["copy_dealer"].mean
+
+def test_chunks_are_scheduled_lazily():
+    built = []
+    def chunk_args(index):
+        built.append(index)
+        return (index, 2)
+    chunk_results = run_chunks(pow, chunk_args, 100, num_workers=2)
+    assert next(chunk_results) == 0
+    assert len(built) <= 2 * CHUNKS_IN_FLIGHT_PER_WORKER
+    assert list(chunk_results) == [index * index for index in range(1, 100)]
+    chunk_results.close()
@@ -0,0 +1,23 @@
+import random
+from counting import *
+from player import dealer_strategy, player_strategy
+
+def test_count_matches_cards_seen():
+    session = CountingSession(1, dealer_strategy, player_strategy, rng=random.Random(0), bet_ramp=LinearBetRamp(8))
+    shoe = session.shoe
+    full_count = sum(shoe.card_tags[card_id] for card_id in range(len(CARDS)))
+    for _ in range(5000):
+        session.play_round(10)
+        # Starting the next round turns over the hole card.
+        shoe.start_round()
+        assert shoe.running_count == full_count - sum(shoe.card_tags[card_id] for card_id in shoe.deck)
+
+def test_shoe_is_readied_once_per_round():
+    session = CountingSession(6, dealer_strategy, player_strategy, rng=random.Random(1), bet_ramp=LinearBetRamp(8))
+    calls = []
+    shuffle_if_needed = session.shoe.shuffle_if_needed
+    session.shoe.shuffle_if_needed = lambda: calls.append(None) or shuffle_if_needed()
+    for _ in range(1000):
+        session.play_round(10)
+    assert len(calls) == 1000
+    assert session.money_bet > 1000 * 10
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from dealer import *
+from shoe import remove_card, shoe_counts
+
+def reference_outcomes(ranks, counts, hit_soft_17: bool) -> np.ndarray:
+    # Draws card by card from `counts`, the slow way.
+    hard_total = sum(ranks)
+    soft = 1 in ranks and hard_total <= 11
+    value = hard_total + 10 if soft else hard_total
+    outcome = np.zeros(BUST + 1)
+    if value > 21:
+        outcome[BUST] = 1
+        return outcome
+    if value >= 17 and not (hit_soft_17 and soft and value == 17):
+        outcome[value - 17] = 1
+        return outcome
+    total = sum(counts)
+    for rank in range(1, 11):
+        if counts[rank - 1]:
+            outcome += counts[rank - 1] / total * reference_outcomes(
+                ranks + [rank], remove_card(counts, rank), hit_soft_17
+            )
+    return outcome
+
+@pytest.mark.parametrize("hit_soft_17", [False, True])
+def test_outcomes_match_card_by_card_draws(hit_soft_17):
+    counts = remove_card(remove_card(shoe_counts(1), 10), 5)
+    for upcard in (1, 6, 10):
+        expected = reference_outcomes([upcard], remove_card(counts, upcard), hit_soft_17)
+        actual = dealer_outcomes(upcard, remove_card(counts, upcard), hit_soft_17)
+        assert actual.sum() == pytest.approx(1)
+        np.testing.assert_allclose(actual, expected, atol=1e-12)
+
+def test_cache_reuses_and_evicts_entries():
+    cache = DealerOutcomeCache(maxsize=2)
+    counts = shoe_counts(6)
+    first = cache.get(10, counts)
+    assert cache.get(10, counts) is first
+    cache.get(9, counts)
+    cache.get(8, counts)
+    assert len(cache.entries) == 2 and (10, counts) not in cache.entries
+    assert (cache.hits, cache.misses) == (1, 3)
+    np.testing.assert_array_equal(cache.get(10, counts), first)
+
+def test_stand_ev():
+    dealer = np.array([0.1, 0.1, 0.2, 0.2, 0.1, 0.3])
+    assert stand_ev(16, dealer) == pytest.approx(0.3 - 0.7)
+    assert stand_ev(19, dealer) == pytest.approx(0.3 + 0.2 - 0.3)
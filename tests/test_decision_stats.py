@@ -0,0 +1,46 @@
+import random
+import numpy as np
+from decision_stats import *
+from game import BlackjackSession
+from player import basic_strategy, dealer_strategy, player_strategy
+from rules import DEFAULT_RULES, VEGAS_STRIP
+from runner import run_simulation
+
+def simulate(num_workers: int = 1, **options):
+    return run_simulation(
+        20000, 6, dealer_strategy, player_strategy, 10, seed=8, num_workers=num_workers, chunk_size=5000,
+        progress=False, **options,
+    )
+
+def test_recording_does_not_change_results():
+    recorded = simulate(decision_stats=True)
+    assert recorded.money_won == simulate().money_won
+    merged = simulate(num_workers=2, decision_stats=True)
+    for array, other in zip(recorded.decision_stats.arrays(), merged.decision_stats.arrays()):
+        assert np.array_equal(array, other)
+
+def test_cells_hold_the_table_decisions():
+    decision_stats = simulate(decision_stats=True).decision_stats
+    counts, _, _ = decision_stats.arrays()
+    for state in range(NUM_STATES):
+        for upcard in UPCARD_RANKS:
+            made = np.flatnonzero(counts[state, upcard - 1])
+            assert made.size == 0 or made.tolist() == [basic_strategy.decision(state, upcard).value]
+    # Hard 20 standing against a six.
+    assert decision_stats.ev()[20 - HARD_TOTALS.start, 5, Decision.STAND.value] > 0.4
+
+def test_staged_cells_flush_to_the_same_totals(monkeypatch):
+    def play(rules):
+        decision_stats = DecisionStats()
+        session = BlackjackSession(
+            6, dealer_strategy, player_strategy, rng=random.Random(3), rules=rules, decision_stats=decision_stats
+        )
+        for _ in range(3000):
+            session.play_round(10)
+        return decision_stats.arrays()
+    for rules in (DEFAULT_RULES, VEGAS_STRIP):
+        totals = play(rules)
+        monkeypatch.setattr(DecisionStats, "FLUSH_SIZE", 7)
+        for array, other in zip(totals, play(rules)):
+            assert np.allclose(array, other)
+        monkeypatch.undo()
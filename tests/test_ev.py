@@ -0,0 +1,58 @@
+import pytest
+import ev
+from ev import *
+from optimizer import StrategySolver, solve_cells
+from player import player_strategy, dealer_strategy
+from rules import VEGAS_STRIP
+from runner import run_simulation
+
+@pytest.fixture(scope="module")
+def default_ev() -> float:
+    return expected_value(player_strategy, 6)
+
+def test_default_rules_ev_is_unchanged(default_ev):
+    assert default_ev == pytest.approx(-0.024647, abs=1e-6)
+
+def test_ev_matches_simulation(default_ev):
+    # About three standard errors of a 300k round simulation.
+    num_rounds = 300_000
+    result = run_simulation(num_rounds, 6, dealer_strategy, player_strategy, 1, seed=6, num_workers=1, progress=False)
+    assert result.money_won / num_rounds == pytest.approx(default_ev, abs=0.006)
+
+def test_ten_pairs_share_a_face():
+    # Two tens from one deck leave 14; 3 of the other 15 match the first.
+    assert ten_pair_probability(remove_card(remove_card(shoe_counts(1), 10), 10)) == pytest.approx(3 / 15)
+
+def test_rules_ev_matches_simulation():
+    # About three standard errors of a 300k round simulation.
+    num_rounds = 300_000
+    result = run_simulation(
+        num_rounds, 6, dealer_strategy, player_strategy, 1, seed=5, num_workers=1,
+        progress=False, session_options={"rules": VEGAS_STRIP},
+    )
+    assert result.money_won / num_rounds == pytest.approx(
+        expected_value(player_strategy, 6, rules=VEGAS_STRIP), abs=0.006
+    )
+
+def test_split_aces_get_one_card():
+    rules = Rules(split_aces_one_card=True)
+    calculator = EVCalculator(player_strategy, rules=rules)
+    counts = remove_card(remove_card(shoe_counts(1), 1), 5)
+    # Soft 16 would hit against a ten; a split ace has to stand on it.
+    assert calculator.hand_ev((1, 5), 10, counts, split_rank=1) == calculator.dealer.stand_ev(16, 10, counts)
+    assert calculator.hand_ev((1, 5), 10, counts) != calculator.hand_ev((1, 5), 10, counts, split_rank=1)
+
+def test_solver_follows_rules():
+    counts = shoe_counts(6)
+    assert solve_cells(counts, DEFAULT_RULES, 10, "hard")[16] == Decision.HIT
+    assert solve_cells(counts, VEGAS_STRIP, 10, "hard")[16] == Decision.SURRENDER
+    assert set(solve_cells(counts, Rules(max_hands=1), 10, "pair").values()) == {"N"}
+
+def test_unmodelled_rules_are_rejected(monkeypatch):
+    monkeypatch.setattr(ev, "MODELLED_RULES", ev.MODELLED_RULES - {"surrender"})
+    with pytest.raises(ValueError):
+        StrategySolver(shoe_counts(6), Rules(surrender=True))
+    with pytest.raises(ValueError):
+        expected_value(player_strategy, 6, rules=Rules(surrender=True))
+    # Rules left at their defaults don't need modelling.
+    StrategySolver(shoe_counts(6), Rules(max_hands=2))
@@ -0,0 +1,37 @@
+import random
+from utils import *
+
+def test_card_ids_round_trip():
+    assert len(CARDS) == 52
+    for card_id, card in enumerate(CARDS):
+        assert CARD_IDS[(card.suite, card.value)] == card_id
+        assert CARD_RANKS[card_id] == card.rank == rank_map[card.value]
+
+def reference_value(cards) -> int:
+    hard_total = sum(card.rank for card in cards)
+    return hard_total + 10 if any(card.value == Value.ACE for card in cards) and hard_total <= 11 else hard_total
+
+def test_hand_tracks_totals_as_cards_arrive():
+    rng = random.Random(0)
+    for _ in range(5000):
+        cards = [rng.choice(CARDS) for _ in range(rng.randrange(2, 7))]
+        hand = Hand(cards[:1])
+        hand.extend(cards[1:])
+        value = reference_value(cards)
+        if value > 21:
+            assert hand.value > 21
+            continue
+        assert hand.value == value == calculate_hand_value(list(cards))
+        assert hand.hard_total == sum(card.rank for card in cards)
+        assert hand.is_soft == (hand.value != hand.hard_total)
+        assert hand.is_pair == (len(cards) == 2 and cards[0].value == cards[1].value)
+        assert hand.copy().state == hand.state == Hand(cards).state
+
+def test_transition_table_steps_every_state():
+    assert len(HAND_NEXT) == NUM_HAND_STATES * NUM_FACES
+    for state, (hard_total, has_ace, num_cards, _) in enumerate(HAND_STATES):
+        for face, rank in enumerate(FACE_RANKS):
+            next_total, next_has_ace, next_num_cards, _ = HAND_STATES[HAND_NEXT[state * NUM_FACES + face]]
+            assert next_total == min(hard_total + rank, MAX_HARD_TOTAL)
+            assert next_has_ace == (has_ace or rank == 1)
+            assert next_num_cards == min(num_cards + 1, 3)
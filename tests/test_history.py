@@ -0,0 +1,41 @@
+import random
+import numpy as np
+import pytest
+from game import *
+from history import *
+from rules import VEGAS_STRIP
+
+def values(cards: np.ndarray) -> np.ndarray:
+    ranks = card_ranks(cards).astype(np.int64)
+    hard_totals = ranks.sum(axis=1)
+    soft = (ranks == 1).any(axis=1) & (hard_totals <= 11)
+    return np.where(soft, hard_totals + 10, hard_totals)
+
+@pytest.mark.parametrize("rules", [DEFAULT_RULES, VEGAS_STRIP])
+def test_records_replay_the_session(tmp_path, rules):
+    path = str(tmp_path / "hands.bjh")
+    with HandHistoryWriter(path, buffer_size=1000) as writer:
+        session = BlackjackSession(6, dealer_strategy, player_strategy, rng=random.Random(0), history=writer, rules=rules)
+        money_won = [session.play_round(10) for _ in range(3000)]
+    records = read_history(path)
+
+    assert len(records) == session.hands_played
+    first = np.flatnonzero(records["hand"] == 0)
+    assert np.array_equal(records["round"][first], np.arange(3000))
+    assert np.array_equal(records["round_won"][first], money_won)
+    assert np.array_equal(np.diff(np.append(first, len(records))), records["num_hands"][first])
+
+    assert np.array_equal(values(records["cards"]), records["value"])
+    played = records["dealer_value"] > 0
+    assert np.array_equal(values(records["dealer_cards"])[played], records["dealer_value"][played])
+    assert np.all(records["cards"][:, 0] != NO_CARD) and np.all(records["num_cards"] >= 2)
+
+    # Split hands start with the decisions that split them.
+    split = records[records["num_hands"] > 1]
+    assert len(split) and np.all(split["decisions"][:, 0] == Decision.SPLIT.value)
+
+def test_other_record_layouts_are_rejected(tmp_path):
+    path = tmp_path / "hands.bjh"
+    path.write_bytes(MAGIC + (RECORD_DTYPE.itemsize + 1).to_bytes(8, "little"))
+    with pytest.raises(AssertionError):
+        read_history(str(path))
@@ -0,0 +1,29 @@
+import random
+from game import *
+from lockstep import LockstepTables, ScalarPlayerStrategy
+
+NUM_TABLES = 32
+
+class CountingStrategy(ScalarPlayerStrategy):
+    calls = 0
+    decisions = 0
+
+    def decide_batch(self, batch):
+        self.calls += 1
+        self.decisions += len(batch.hands)
+        return super().decide_batch(batch)
+
+def test_tables_play_the_rounds_sessions_would():
+    for player in (basic_strategy, CountingStrategy(player_strategy)):
+        # LockstepTables seeds each table's shoe from its rng in turn.
+        seeds = random.Random(5)
+        sessions = [
+            BlackjackSession(6, dealer_strategy, player_strategy, rng=random.Random(seeds.getrandbits(64)))
+            for _ in range(NUM_TABLES)
+        ]
+        tables = LockstepTables(NUM_TABLES, 6, dealer_strategy, player, rng=random.Random(5))
+        for _ in range(300):
+            assert tables.play_round(10) == [session.play_round(10) for session in sessions]
+        assert tables.hands_played == sum(session.hands_played for session in sessions)
+    # Every step asks about all the tables' pending hands in one call.
+    assert player.decisions > 10 * player.calls
@@ -0,0 +1,24 @@
+from player import dealer_strategy, player_strategy
+from rules import VEGAS_STRIP
+from runner import run_simulation
+
+def profile(**options):
+    return run_simulation(
+        6000, 6, dealer_strategy, player_strategy, 10, seed=2, num_workers=2, chunk_size=2000,
+        progress=False, profile=True, **options,
+    )
+
+def test_profile_counts_every_round_and_hand():
+    result = profile()
+    profile_dict = result.profile.to_dict()
+    assert profile_dict["rounds"] == result.rounds_played == 6000
+    assert profile_dict["hands"] == result.hands_played
+    assert sum(profile_dict["split_depths"].values()) + profile_dict["natural_rounds"] == 6000
+    assert profile_dict["phases"]["play"]["calls"] == 6000
+    assert "rounds settled on naturals" in result.profile.report()
+
+def test_profiling_does_not_change_results():
+    plain = run_simulation(6000, 6, dealer_strategy, player_strategy, 10, seed=2, num_workers=1, chunk_size=2000, progress=False)
+    assert profile().money_won == plain.money_won
+    # Peeked naturals end rounds before any hand is played.
+    assert profile(session_options={"rules": VEGAS_STRIP}).profile.natural_rounds > 0
@@ -0,0 +1,37 @@
+import pytest
+from player import dealer_strategy, player_strategy
+from rng import *
+from runner import run_simulation
+from shoe import *
+
+def test_streams_are_reproducible_and_distinct():
+    for backend in RNG_BACKENDS:
+        assert make_stream(backend, 1, 2).random() == make_stream(backend, 1, 2).random()
+        draws = {make_stream(backend, seed, stream).random() for seed in (1, 2) for stream in (0, 1)}
+        assert len(draws) == 4
+    with pytest.raises(ValueError):
+        make_stream("mt", 1, 0)
+
+def test_numpy_rng_shuffles_in_place():
+    rng = NumpyRNG(0)
+    for shoe_class in (Shoe, LazyShoe):
+        # Every card of a one-deck shoe is dealt exactly once.
+        shoe = shoe_class(1, rng=rng)
+        assert sorted(CARDS.index(shoe.draw_card()) for _ in range(52)) == list(range(52))
+    deck = bytearray(shoe_card_ids(6))
+    rng.shuffle(deck)
+    assert deck != shoe_card_ids(6) and sorted(deck) == sorted(shoe_card_ids(6))
+    shoes = rng.shuffled_shoes(shoe_card_ids(1), 4)
+    assert shoes.shape == (4, 52) and all(sorted(row) == list(range(52)) for row in shoes.tolist())
+    assert 0 <= rng.getrandbits(5) < 32 and 0 <= rng.randrange(7) < 7
+
+def test_numpy_backend_does_not_depend_on_workers():
+    results = [
+        run_simulation(
+            12000, 6, dealer_strategy, player_strategy, 10, seed=3, num_workers=workers,
+            chunk_size=3000, progress=False, rng_backend="numpy",
+        )
+        for workers in (1, 2)
+    ]
+    assert results[0].money_won == results[1].money_won
+    assert results[0].hands_played == results[1].hands_played
@@ -0,0 +1,106 @@
+import random
+from game import *
+from rules import Rules, VEGAS_STRIP, EUROPEAN_NO_HOLE_CARD
+
+def card(value: Value, suite: Suite = Suite.HEARTS) -> Card:
+    return CARDS[CARD_IDS[(suite, value)]]
+
+def always_split(player_cards, dealer_showing):
+    # Spots pairs from the cards, the way the original strategies did.
+    if len(player_cards) == 2 and player_cards[0].value == player_cards[1].value:
+        return Decision.SPLIT
+    return basic_strategy(player_cards, dealer_showing)
+
+def play_pair_at_limit(strategy, value: Value, upcard: Value) -> List[HandOutcome]:
+    game = BlackjackGame(6, dealer_strategy, strategy, rules=Rules(max_hands=2), deal=False)
+    game.num_hands = 2
+    return game.play_player_hand(Hand([card(value), card(value, Suite.SPADES)]), card(upcard), 10)
+
+def test_pair_at_split_limit_plays_its_total():
+    # 9,9 is 18, which stands against a 6.
+    for strategy in (player_strategy, basic_strategy, lambda cards, upcard: basic_strategy(cards, upcard)):
+        outcomes = play_pair_at_limit(strategy, Value.NINE, Value.SIX)
+        assert len(outcomes) == 1
+        assert len(outcomes[0].cards) == 2 and outcomes[0].value == 18
+
+def test_repeated_split_at_limit_falls_back_to_table():
+    # A card-based strategy still says SPLIT after the hand is unpaired.
+    outcomes = play_pair_at_limit(always_split, Value.NINE, Value.SIX)
+    assert len(outcomes) == 1 and outcomes[0].value == 18
+    # 8,8 is a hard 16, which hits against a ten.
+    outcomes = play_pair_at_limit(always_split, Value.EIGHT, Value.TEN)
+    assert len(outcomes[0].cards) > 2
+
+def test_card_based_splitter_plays_every_rule_set():
+    for rules in (Rules(max_hands=2), VEGAS_STRIP, EUROPEAN_NO_HOLE_CARD):
+        session = BlackjackSession(1, dealer_strategy, always_split, rng=random.Random(0), rules=rules)
+        for _ in range(5000):
+            session.play_round(10)
+        assert session.rounds_played == 5000
+        if rules.max_hands is not None:
+            assert session.hands_played <= 5000 * rules.max_hands
+
+def test_default_rules_keep_original_methods():
+    game = BlackjackGame(6, dealer_strategy, player_strategy)
+    assert game.play.__func__ is BlackjackGame.play
+    assert game.play_player_hand.__func__ is BlackjackGame.play_player_hand
+
+def test_surrender_and_payout():
+    rules = Rules(surrender=True, blackjack_payout=1.5)
+    game = BlackjackGame(6, dealer_strategy, lambda cards, upcard: Decision.SURRENDER, rules=rules, deal=False)
+    game.player_cards = Hand([card(Value.TEN), card(Value.SIX)])
+    game.dealer_showing = card(Value.TEN, Suite.CLUBS)
+    game.dealer_cards = Hand([game.dealer_showing, card(Value.SEVEN, Suite.CLUBS)])
+    assert game.play(10) == -5
+    game.player_cards = Hand([card(Value.ACE), card(Value.KING)])
+    assert game.play(10) == 15
+
+def rigged_game(rules: Rules, strategy, player: List[Value], dealer: List[Value], draws: List[Value]) -> BlackjackGame:
+    game = BlackjackGame(6, dealer_strategy, strategy, rules=rules, deal=False)
+    game.player_cards = Hand([card(value) for value in player])
+    game.dealer_showing = card(dealer[0], Suite.CLUBS)
+    game.dealer_cards = Hand([card(value, Suite.CLUBS) for value in dealer])
+    cards = iter([card(value, Suite.DIAMONDS) for value in draws])
+    game.draw_card = lambda: next(cards)
+    return game
+
+def test_peeked_natural_ends_the_round():
+    asked = []
+    def strategy(cards, upcard):
+        asked.append(cards)
+        return Decision.HIT
+    rules = Rules(blackjack_payout=1.5, dealer_peeks=True)
+    assert rigged_game(rules, strategy, [Value.TEN, Value.SIX], [Value.ACE, Value.KING], []).play(10) == -10
+    assert rigged_game(rules, strategy, [Value.ACE, Value.KING], [Value.ACE, Value.KING], []).play(10) == 0
+    assert not asked
+
+def test_unpeeked_natural_takes_doubled_bets():
+    game = rigged_game(
+        Rules(blackjack_payout=1.5), lambda cards, upcard: Decision.DOUBLE_DOWN,
+        [Value.FIVE, Value.SIX], [Value.ACE, Value.KING], [Value.TEN],
+    )
+    assert game.play(10) == -20
+    assert game.player_hand_outcomes[0].value == 21
+
+def split_or_double(cards, upcard):
+    if cards.is_pair:
+        return Decision.SPLIT
+    return Decision.DOUBLE_DOWN if cards.value == 11 else Decision.STAND
+
+def test_split_aces_get_one_card():
+    game = rigged_game(
+        Rules(split_aces_one_card=True), split_or_double,
+        [Value.ACE, Value.ACE], [Value.SIX, Value.TEN], [Value.ACE, Value.TEN, Value.KING],
+    )
+    game.play(10)
+    # The first ace drew another ace and still wasn't resplit.
+    assert [len(outcome.cards) for outcome in game.player_hand_outcomes] == [2, 2]
+    assert [outcome.value for outcome in game.player_hand_outcomes] == [12, 21]
+
+def test_double_after_split_plays_as_hit_without_das():
+    game = rigged_game(
+        Rules(double_after_split=False), split_or_double,
+        [Value.EIGHT, Value.EIGHT], [Value.SIX, Value.TEN], [Value.THREE, Value.NINE, Value.TEN, Value.TEN],
+    )
+    game.play(10)
+    assert [(outcome.value, outcome.money_bet) for outcome in game.player_hand_outcomes] == [(20, 10), (18, 10)]
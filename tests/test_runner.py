@@ -0,0 +1,47 @@
+import pytest
+from player import dealer_strategy, player_strategy
+from rng import make_stream
+from runner import *
+
+def simulate(**options) -> SimulationResult:
+    options = {"seed": 4, "num_workers": 1, "chunk_size": 4000, "progress": False, **options}
+    return run_simulation(20000, 6, dealer_strategy, player_strategy, 10, **options)
+
+def assert_same(result: SimulationResult, other: SimulationResult):
+    assert (result.rounds_played, result.hands_played, result.money_won, result.money_bet) == (
+        other.rounds_played, other.hands_played, other.money_won, other.money_bet
+    )
+    assert (result.stats.count, result.stats.mean, result.stats.variance) == (
+        other.stats.count, other.stats.mean, other.stats.variance
+    )
+
+def test_result_does_not_depend_on_workers():
+    assert_same(simulate(), simulate(num_workers=3))
+
+def test_result_is_the_merge_of_seeded_chunks():
+    merged = SimulationResult()
+    for index in range(5):
+        merged.merge(simulate_chunk(4000, 6, dealer_strategy, player_strategy, 10, make_stream("python", 4, index)))
+    assert_same(simulate(), merged)
+    assert simulate(seed=5).money_won != merged.money_won
+
+def test_resumed_run_is_bit_identical(tmp_path):
+    checkpoint_path = str(tmp_path / "run.ckpt")
+    full = simulate(checkpoint_path=checkpoint_path)
+    config, next_index, saved = load_checkpoint(checkpoint_path)
+    assert next_index == 5
+    assert_same(saved, full)
+
+    # Rewind to an interruption after two chunks.
+    partial = SimulationResult()
+    for index in range(2):
+        partial.merge(simulate_chunk(4000, 6, dealer_strategy, player_strategy, 10, make_stream("python", 4, index)))
+    save_checkpoint(checkpoint_path, config, 2, partial)
+    resumed = resume_simulation(checkpoint_path, num_workers=2, progress=False)
+    assert_same(resumed, full)
+
+def test_checkpoint_rejects_another_configuration(tmp_path):
+    checkpoint_path = str(tmp_path / "run.ckpt")
+    simulate(checkpoint_path=checkpoint_path)
+    with pytest.raises(ValueError):
+        simulate(checkpoint_path=checkpoint_path, seed=5)
@@ -0,0 +1,49 @@
+import random
+import pytest
+from game import *
+from shoe import *
+
+def test_cutoff_is_the_undealt_fraction():
+    assert Shoe(6, penetration=0.8).RESET_CUTOFF == 62
+    assert Shoe(1, penetration=0.75).RESET_CUTOFF == 13
+
+def test_session_reshuffles_only_at_cutoff():
+    session = BlackjackSession(6, dealer_strategy, player_strategy, rng=random.Random(0))
+    shoe = session.shoe
+    shuffles = []
+    shuffle = shoe.shuffle
+    shoe.shuffle = lambda: shuffles.append(None) or shuffle()
+    for _ in range(5000):
+        needed = shoe.needs_shuffle()
+        before = len(shuffles)
+        session.play_round(10)
+        assert len(shuffles) - before == needed
+    # Roughly 250 cards per shoe at about 5.2 cards a round.
+    assert 80 < len(shuffles) < 130
+
+@pytest.mark.parametrize("shoe_class", [Shoe, LazyShoe])
+def test_rounds_finish_when_the_shoe_runs_dry(shoe_class):
+    session = BlackjackSession(
+        1, dealer_strategy, player_strategy, rng=random.Random(0), penetration=0.95, shoe_class=shoe_class
+    )
+    shoe = session.shoe
+    reshuffles = []
+    reshuffle_discards = shoe.reshuffle_discards
+    shoe.reshuffle_discards = lambda: reshuffles.append(None) or reshuffle_discards()
+    for _ in range(20000):
+        session.play_round(10)
+    assert session.rounds_played == 20000
+    assert reshuffles
+
+def test_lazy_shoe_deals_every_card_once_per_shuffle():
+    shoe = LazyShoe(1, rng=random.Random(1))
+    for _ in range(3):
+        dealt = []
+        for _ in range(52):
+            dealt.append(CARDS.index(shoe.draw_card()))
+            counts = list(shoe_counts(1))
+            for card_id in dealt:
+                counts[CARD_RANKS[card_id] - 1] -= 1
+            assert shoe.counts() == tuple(counts) and shoe.cards_remaining() == 52 - len(dealt)
+        assert sorted(dealt) == list(range(52))
+        shoe.shuffle()
@@ -0,0 +1,36 @@
+import random
+import statistics
+import pytest
+from player import dealer_strategy, player_strategy
+from runner import run_simulation
+from stats import *
+
+def test_merged_stats_match_one_pass():
+    rng = random.Random(0)
+    values = [rng.choice((-20, -10, 0, 10, 15, 20)) for _ in range(1000)]
+    parts = [RunningStats() for _ in range(3)]
+    for index, value in enumerate(values):
+        parts[index % 3].add(value)
+    merged = RunningStats()
+    for part in parts:
+        merged.merge(part)
+    merged.merge(RunningStats())
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(statistics.fmean(values))
+    assert merged.variance == pytest.approx(statistics.variance(values))
+    from_sums = RunningStats.from_sums(len(values), sum(values), sum(value * value for value in values))
+    assert from_sums.variance == pytest.approx(merged.variance)
+
+def test_confidence_interval():
+    stats = RunningStats.from_sums(100, 0, 400)
+    assert stats.stderr == pytest.approx(math.sqrt(400 / 99 / 100))
+    low, high = stats.confidence_interval()
+    assert high == -low == pytest.approx(Z_95 * stats.stderr)
+
+def test_run_stops_once_the_interval_is_tight():
+    result = run_simulation(
+        1_000_000, 6, dealer_strategy, player_strategy, 10, seed=0, num_workers=1,
+        chunk_size=2000, progress=False, target_half_width=0.02,
+    )
+    assert result.rounds_played < 1_000_000 and result.rounds_played % 2000 == 0
+    assert result.edge_half_width(10) <= 0.02
@@ -0,0 +1,42 @@
+import pytest
+from strategy_table import *
+from player import basic_strategy
+
+def card(value: Value, suite: Suite = Suite.HEARTS) -> Card:
+    return CARDS[CARD_IDS[(suite, value)]]
+
+def test_only_table_rows_have_decisions():
+    table_hands = [state for state in range(NUM_HAND_STATES) if STRATEGY_STATES[state] != NO_STATE]
+    assert {STRATEGY_STATES[state] for state in table_hands} == set(range(NUM_STATES))
+    for hard_total, _, num_cards, _ in (HAND_STATES[state] for state in table_hands):
+        assert num_cards >= 2 and hard_total <= 21
+
+@pytest.mark.parametrize("cards", [
+    [],
+    [card(Value.ACE)],
+    [card(Value.TEN)],
+    [card(Value.TEN), card(Value.SIX), card(Value.NINE)],
+    [card(Value.ACE), card(Value.TEN), card(Value.SIX), card(Value.NINE)],
+])
+def test_hands_off_the_table_raise(cards):
+    with pytest.raises(ValueError):
+        basic_strategy(Hand(cards), card(Value.SIX))
+
+def test_decision_rejects_states_off_the_table():
+    assert basic_strategy.decision(1, 6) == basic_strategy(Hand([card(Value.TWO), card(Value.THREE)]), card(Value.SIX))
+    for state in (-1, NO_STATE):
+        with pytest.raises(ValueError):
+            basic_strategy.decision(state, 6)
+
+def test_compiled_table_matches_source_tables():
+    for total in HARD_TOTALS:
+        for value, decision in hard_totals[total].items():
+            assert basic_strategy.decision(total - HARD_TOTALS.start, rank_map[value]) == decision
+    for total in SOFT_TOTALS:
+        for value, decision in soft_totals[total].items():
+            assert basic_strategy.decision(SOFT_OFFSET + total - SOFT_TOTALS.start, rank_map[value]) == decision
+
+def test_incomplete_tables_are_rejected():
+    hard = {total: row for total, row in hard_totals.items() if total != 12}
+    with pytest.raises(ValueError, match="hard 12 is missing"):
+        compile_strategy(hard, soft_totals, pair_splitting)
@@ -0,0 +1,27 @@
+import dataclasses
+import sweep
+from sweep import *
+
+def test_cell_key_covers_what_the_cell_simulates():
+    cell = SweepCell(num_decks=6, player_strategy=player_strategy, num_rounds=2000, labels=("a",))
+    key = cell_key(cell, "v1")
+    assert cell_key(dataclasses.replace(cell, labels=("b",)), "v1") == key
+    assert cell_key(SweepCell(num_decks=6, player_strategy=player_strategy, num_rounds=2000), "v1") == key
+    for change in (
+        {"rules": RULE_SETS["vegas_strip"]}, {"penetration": 0.75}, {"seed": 1}, {"num_decks": 2},
+        {"bet_amount": 5}, {"player_strategy": STRATEGIES["copy_dealer"]}, {"rng_backend": "numpy"},
+    ):
+        assert cell_key(dataclasses.replace(cell, **change), "v1") != key
+    assert cell_key(cell, "v2") != key
+
+def test_cached_cells_are_not_run_again(tmp_path, monkeypatch):
+    cells = grid([1], {"basic": player_strategy}, {"default": DEFAULT_RULES, "vegas": RULE_SETS["vegas_strip"]},
+                 num_rounds=2000, chunk_size=1000)
+    results = run_sweep(cells, num_workers=1, cache_dir=str(tmp_path), progress=False)
+    assert len(list(tmp_path.iterdir())) == 2
+
+    def run_cell(cell):
+        raise AssertionError("cell was run again")
+    monkeypatch.setattr(sweep, "run_cell", run_cell)
+    cached = run_sweep(cells, num_workers=1, cache_dir=str(tmp_path), progress=False)
+    assert [result.money_won for result in cached] == [result.money_won for result in results]
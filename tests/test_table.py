@@ -0,0 +1,28 @@
+import random
+import pytest
+from game import BlackjackSession
+from rules import VEGAS_STRIP
+from table import *
+
+@pytest.mark.parametrize("rules", [DEFAULT_RULES, VEGAS_STRIP])
+def test_one_seat_plays_like_a_session(rules):
+    # One seat is dealt in the same order as a single game.
+    table = BlackjackTable(6, dealer_strategy, [Seat(player_strategy)], rng=random.Random(1), rules=rules)
+    session = BlackjackSession(6, dealer_strategy, player_strategy, rng=random.Random(1), rules=rules)
+    for _ in range(3000):
+        assert table.play_round() == [session.play_round(10)]
+    assert table.hands_played == [session.hands_played]
+
+def test_full_table_shares_the_shoe():
+    table = BlackjackTable(1, dealer_strategy, [Seat(player_strategy) for _ in range(MAX_SEATS)], rng=random.Random(2))
+    assert table.shoe.RESET_CUTOFF == CARDS_PER_HAND * (MAX_SEATS + 1)
+    for _ in range(3000):
+        table.play_round()
+    assert table.rounds_played == 3000
+    # Two cards per seat and the dealer, plus the hits.
+    assert 2 * (MAX_SEATS + 1) < table.cards_dealt / table.rounds_played < CARDS_PER_HAND * (MAX_SEATS + 1)
+
+def test_seat_count_is_checked():
+    for num_seats in (0, MAX_SEATS + 1):
+        with pytest.raises(ValueError):
+            BlackjackTable(6, dealer_strategy, [Seat(player_strategy) for _ in range(num_seats)])
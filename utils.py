@@ -1,5 +1,5 @@
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List
 
 class Suite(Enum):
@@ -30,6 +30,7 @@ class Decision(Enum):
     STAND = 1
     SPLIT = 2
     DOUBLE_DOWN = 3
+    SURRENDER = 4
 
 value_map = {
     Value.TWO: 2,
@@ -47,41 +48,227 @@ value_map = {
     Value.ACE: 11,
 }
 
+# Compact blackjack rank used by the engine: 1 for an ace, 2-9 for pip cards
+# and 10 for every ten-valued card.
+rank_map = {value: 1 if value == Value.ACE else min(value_map[value], 10) for value in Value}
+
 
 @dataclass
 class Card:
     suite: Suite
     value: Value
+    rank: int = field(init=False, repr=False, compare=False)
+    face: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.rank = rank_map[self.value]
+        self.face = self.value.value - Value.TWO.value
 
     def __repr__(self):
         return f"{self.value} of {self.suite}"
 
+# Every distinct card, indexed by a small integer card id. Shoes hold card ids
+# and hand out these shared Card objects as a read-only view for display.
+CARDS = tuple(Card(suite=suite, value=value) for suite in Suite for value in Value)
+CARD_IDS = {(card.suite, card.value): card_id for card_id, card in enumerate(CARDS)}
+CARD_RANKS = bytes(card.rank for card in CARDS)
+
+# Hand states. Every hand is one of a few hundred states (hard total, whether
+# it holds an ace, cards held as 0/1/2/3+, and the face of its first card
+# while that can still make a pair), numbered once at import. A card's face
+# is its Value's position (TWO = 0 ... ACE = 12), so JACK+KING is no pair,
+# as in the game. HAND_NEXT[state * NUM_FACES + face] is the state after
+# drawing that face, so a hand's totals never have to be recomputed.
+#
+# Drawing to a bust hand never happens in the game; if it does, the hard
+# total just saturates at MAX_HARD_TOTAL, which is still a bust.
+NUM_FACES = len(Value)
+FACE_RANKS = tuple(rank_map[value] for value in Value)
+# The face that stands for each compact rank (TEN for every ten-valued card),
+# for code that only deals in ranks.
+RANK_FACES = {rank: FACE_RANKS.index(rank) for rank in range(1, 11)}
+MAX_HARD_TOTAL = 31
+EMPTY_HAND = 0
+
+def _next_hand_state(hand_state: tuple, face: int) -> tuple:
+    hard_total, has_ace, num_cards, first_face = hand_state
+    rank = FACE_RANKS[face]
+    if hard_total > 21:
+        return (min(hard_total + rank, MAX_HARD_TOTAL), has_ace or rank == 1, 3, -1)
+    if num_cards == 0:
+        return (rank, rank == 1, 1, face)
+    if num_cards == 1:
+        return (hard_total + rank, has_ace or rank == 1, 2, face if face == first_face else -1)
+    return (hard_total + rank, has_ace or rank == 1, 3, -1)
+
+def _build_hand_states():
+    states = [(0, False, 0, -1)]
+    numbers = {states[0]: EMPTY_HAND}
+    transitions = []
+    for hand_state in states:
+        # Every pair also gets the same two cards as a non-pair, the state it
+        # is played as when it can't be split. Only A,A and 2,2 need new ones.
+        hard_total, has_ace, num_cards, first_face = hand_state
+        if num_cards == 2 and first_face >= 0 and (hard_total, has_ace, 2, -1) not in numbers:
+            numbers[(hard_total, has_ace, 2, -1)] = len(states)
+            states.append((hard_total, has_ace, 2, -1))
+        for face in range(NUM_FACES):
+            next_state = _next_hand_state(hand_state, face)
+            if next_state not in numbers:
+                numbers[next_state] = len(states)
+                states.append(next_state)
+            transitions.append(numbers[next_state])
+    return states, transitions
+
+HAND_STATES, HAND_NEXT = _build_hand_states()
+NUM_HAND_STATES = len(HAND_STATES)
+HAND_HARD_TOTALS = [hard_total for hard_total, _, _, _ in HAND_STATES]
+HAND_IS_SOFT = [has_ace and hard_total <= 11 for hard_total, has_ace, _, _ in HAND_STATES]
+HAND_VALUES = [
+    hard_total + 10 if soft else hard_total
+    for hard_total, soft in zip(HAND_HARD_TOTALS, HAND_IS_SOFT)
+]
+# The compact rank of a two-card pair, 0 for every other hand.
+HAND_PAIR_RANKS = [
+    FACE_RANKS[face] if num_cards == 2 and face >= 0 else 0
+    for _, _, num_cards, face in HAND_STATES
+]
+
+# The state each pair is played as when it can't be split; every other
+# state maps to itself.
+UNPAIRED_HAND_STATES = [
+    HAND_STATES.index((hard_total, has_ace, 2, -1)) if pair_rank else state
+    for state, ((hard_total, has_ace, _, _), pair_rank) in enumerate(zip(HAND_STATES, HAND_PAIR_RANKS))
+]
+
+def hand_state(cards: List[Card]) -> int:
+    state = EMPTY_HAND
+    for card in cards:
+        state = HAND_NEXT[state * NUM_FACES + card.face]
+    return state
+
+class Hand(list):
+    # A list of cards that keeps its hand state up to date as cards are
+    # appended, so strategies never have to rescan it. Only append/extend
+    # are tracked.
+    __slots__ = ("state",)
+
+    def __init__(self, cards=()):
+        list.__init__(self, cards)
+        self.state = hand_state(self)
+
+    def append(self, card: Card):
+        list.append(self, card)
+        self.state = HAND_NEXT[self.state * NUM_FACES + card.face]
+
+    def extend(self, cards):
+        for card in cards:
+            self.append(card)
+
+    def copy(self) -> "Hand":
+        hand = Hand.__new__(Hand)
+        list.__init__(hand, self)
+        hand.state = self.state
+        return hand
+
+    def unpair(self):
+        # From here on the hand is played as its ordinary total, not a pair.
+        self.state = UNPAIRED_HAND_STATES[self.state]
+
+    @property
+    def hard_total(self) -> int:
+        return HAND_HARD_TOTALS[self.state]
+
+    @property
+    def is_soft(self) -> bool:
+        return HAND_IS_SOFT[self.state]
+
+    @property
+    def value(self) -> int:
+        return HAND_VALUES[self.state]
+
+    @property
+    def is_pair(self) -> bool:
+        return HAND_PAIR_RANKS[self.state] > 0
+
 @dataclass
 class HandOutcome:
     cards: List[Card]
     value: int
     money_bet: int
+    surrendered: bool = False
 
 def calculate_hand_value(cards: List[Card]) -> int:
-    total = 0
-    num_aces = 0
-    for card in cards:
-        total += value_map[card.value]
-        num_aces += card.value == Value.ACE
-
-    while num_aces and total > 21:
-        num_aces -= 1
-        total -= 10
-
-    return total    
+    if isinstance(cards, Hand):
+        return cards.value
+    return HAND_VALUES[hand_state(cards)]
 
 def calculate_lowest_hand_value(cards: List[Card]) -> int:
-    total = 0
-    for card in cards:
-        total += 1 if card.value == Value.ACE else value_map[card.value]
-    return total
+    if isinstance(cards, Hand):
+        return cards.hard_total
+    return HAND_HARD_TOTALS[hand_state(cards)]
 
 hard_totals = {
+    21: {
+        Value.TWO: Decision.STAND,
+        Value.THREE: Decision.STAND,
+        Value.FOUR: Decision.STAND,
+        Value.FIVE: Decision.STAND,
+        Value.SIX: Decision.STAND,
+        Value.SEVEN: Decision.STAND,
+        Value.EIGHT: Decision.STAND,
+        Value.NINE: Decision.STAND,
+        Value.TEN: Decision.STAND,
+        Value.JACK: Decision.STAND,
+        Value.QUEEN: Decision.STAND,
+        Value.KING: Decision.STAND,
+        Value.ACE: Decision.STAND,
+    },
+    20: {
+        Value.TWO: Decision.STAND,
+        Value.THREE: Decision.STAND,
+        Value.FOUR: Decision.STAND,
+        Value.FIVE: Decision.STAND,
+        Value.SIX: Decision.STAND,
+        Value.SEVEN: Decision.STAND,
+        Value.EIGHT: Decision.STAND,
+        Value.NINE: Decision.STAND,
+        Value.TEN: Decision.STAND,
+        Value.JACK: Decision.STAND,
+        Value.QUEEN: Decision.STAND,
+        Value.KING: Decision.STAND,
+        Value.ACE: Decision.STAND,
+    },
+    19: {
+        Value.TWO: Decision.STAND,
+        Value.THREE: Decision.STAND,
+        Value.FOUR: Decision.STAND,
+        Value.FIVE: Decision.STAND,
+        Value.SIX: Decision.STAND,
+        Value.SEVEN: Decision.STAND,
+        Value.EIGHT: Decision.STAND,
+        Value.NINE: Decision.STAND,
+        Value.TEN: Decision.STAND,
+        Value.JACK: Decision.STAND,
+        Value.QUEEN: Decision.STAND,
+        Value.KING: Decision.STAND,
+        Value.ACE: Decision.STAND,
+    },
+    18: {
+        Value.TWO: Decision.STAND,
+        Value.THREE: Decision.STAND,
+        Value.FOUR: Decision.STAND,
+        Value.FIVE: Decision.STAND,
+        Value.SIX: Decision.STAND,
+        Value.SEVEN: Decision.STAND,
+        Value.EIGHT: Decision.STAND,
+        Value.NINE: Decision.STAND,
+        Value.TEN: Decision.STAND,
+        Value.JACK: Decision.STAND,
+        Value.QUEEN: Decision.STAND,
+        Value.KING: Decision.STAND,
+        Value.ACE: Decision.STAND,
+    },
     17: {
         Value.TWO: Decision.STAND,
         Value.THREE: Decision.STAND,
@@ -232,9 +419,84 @@ hard_totals = {
         Value.KING: Decision.HIT,
         Value.ACE: Decision.HIT,
     },
+    7: {
+        Value.TWO: Decision.HIT,
+        Value.THREE: Decision.HIT,
+        Value.FOUR: Decision.HIT,
+        Value.FIVE: Decision.HIT,
+        Value.SIX: Decision.HIT,
+        Value.SEVEN: Decision.HIT,
+        Value.EIGHT: Decision.HIT,
+        Value.NINE: Decision.HIT,
+        Value.TEN: Decision.HIT,
+        Value.JACK: Decision.HIT,
+        Value.QUEEN: Decision.HIT,
+        Value.KING: Decision.HIT,
+        Value.ACE: Decision.HIT,
+    },
+    6: {
+        Value.TWO: Decision.HIT,
+        Value.THREE: Decision.HIT,
+        Value.FOUR: Decision.HIT,
+        Value.FIVE: Decision.HIT,
+        Value.SIX: Decision.HIT,
+        Value.SEVEN: Decision.HIT,
+        Value.EIGHT: Decision.HIT,
+        Value.NINE: Decision.HIT,
+        Value.TEN: Decision.HIT,
+        Value.JACK: Decision.HIT,
+        Value.QUEEN: Decision.HIT,
+        Value.KING: Decision.HIT,
+        Value.ACE: Decision.HIT,
+    },
+    5: {
+        Value.TWO: Decision.HIT,
+        Value.THREE: Decision.HIT,
+        Value.FOUR: Decision.HIT,
+        Value.FIVE: Decision.HIT,
+        Value.SIX: Decision.HIT,
+        Value.SEVEN: Decision.HIT,
+        Value.EIGHT: Decision.HIT,
+        Value.NINE: Decision.HIT,
+        Value.TEN: Decision.HIT,
+        Value.JACK: Decision.HIT,
+        Value.QUEEN: Decision.HIT,
+        Value.KING: Decision.HIT,
+        Value.ACE: Decision.HIT,
+    },
+    4: {
+        Value.TWO: Decision.HIT,
+        Value.THREE: Decision.HIT,
+        Value.FOUR: Decision.HIT,
+        Value.FIVE: Decision.HIT,
+        Value.SIX: Decision.HIT,
+        Value.SEVEN: Decision.HIT,
+        Value.EIGHT: Decision.HIT,
+        Value.NINE: Decision.HIT,
+        Value.TEN: Decision.HIT,
+        Value.JACK: Decision.HIT,
+        Value.QUEEN: Decision.HIT,
+        Value.KING: Decision.HIT,
+        Value.ACE: Decision.HIT,
+    },
 }
 
 soft_totals = {
+    21: {  # A+10
+        Value.TWO: Decision.STAND,
+        Value.THREE: Decision.STAND,
+        Value.FOUR: Decision.STAND,
+        Value.FIVE: Decision.STAND,
+        Value.SIX: Decision.STAND,
+        Value.SEVEN: Decision.STAND,
+        Value.EIGHT: Decision.STAND,
+        Value.NINE: Decision.STAND,
+        Value.TEN: Decision.STAND,
+        Value.JACK: Decision.STAND,
+        Value.QUEEN: Decision.STAND,
+        Value.KING: Decision.STAND,
+        Value.ACE: Decision.STAND,
+    },
     20: {  # A+9
         Value.TWO: Decision.STAND,
         Value.THREE: Decision.STAND,
@@ -355,6 +617,21 @@ soft_totals = {
         Value.KING: Decision.HIT,
         Value.ACE: Decision.HIT,
     },
+    12: {  # A+A
+        Value.TWO: Decision.HIT,
+        Value.THREE: Decision.HIT,
+        Value.FOUR: Decision.HIT,
+        Value.FIVE: Decision.HIT,
+        Value.SIX: Decision.HIT,
+        Value.SEVEN: Decision.HIT,
+        Value.EIGHT: Decision.HIT,
+        Value.NINE: Decision.HIT,
+        Value.TEN: Decision.HIT,
+        Value.JACK: Decision.HIT,
+        Value.QUEEN: Decision.HIT,
+        Value.KING: Decision.HIT,
+        Value.ACE: Decision.HIT,
+    },
 }
 
 pair_splitting = {